@@ -1,12 +1,52 @@
 import math
 import random
+import time
+from bitboard import Tablero, indice_jugador, ZOBRIST_TURNO, FILAS, COLUMNAS
+from evaluacion import TableroEvaluado
+from ordenamiento import OrdenMovimientos
+import paralelo
+from transposicion import TablaTransposicion, EXACTO, INFERIOR, SUPERIOR
+from libro_aperturas import abrir_libro
+from solver import Solver
+
+
+class TiempoAgotado(Exception):
+    """Se lanza dentro de minimax cuando se acaba el tiempo de la jugada."""
+
 
 class Agent:
-    def __init__(self, depth, player_id, alpha_beta=False):
+    def __init__(self, depth, player_id, alpha_beta=False, transposicion=None, tiempo_ms=None,
+                 ordenamiento="heuristica+tt", workers=1, libro=None, resolver_desde=None):
         self.id = str(player_id)  
         self.opponent_id = '2' if self.id == '1' else '1'  
+        self.indice = indice_jugador(self.id)
+        self.indice_oponente = 1 - self.indice
         self.alpha_beta = alpha_beta
         self.depth = depth
+        # Tabla de transposición opcional: un tamaño en entradas o una tabla ya creada
+        if transposicion is True:
+            transposicion = TablaTransposicion()
+        elif isinstance(transposicion, int):
+            transposicion = TablaTransposicion(transposicion) if transposicion > 0 else None
+        self.tabla = transposicion
+        # Con tiempo_ms se profundiza iterativamente y depth pasa a ser el máximo (None = sin límite)
+        self.tiempo_ms = tiempo_ms
+        self.limite = None
+        self.nodos = 0
+        self.profundidad_alcanzada = 0
+        self.valor_raiz = None  # Valor de la última jugada elegida (None si salió del libro)
+        # Estrategia de ordenamiento de jugadas (ver ordenamiento.OrdenMovimientos)
+        if not isinstance(ordenamiento, OrdenMovimientos):
+            ordenamiento = OrdenMovimientos(ordenamiento)
+        self.orden = ordenamiento
+        # Con workers > 1 los hijos de la raíz se buscan en un pool de procesos
+        self.workers = workers
+        # Libro de aperturas opcional (ruta o LibroAperturas); se consulta antes de buscar
+        self.libro = abrir_libro(libro)
+        # Con resolver_desde, las posiciones con esa cantidad de casillas vacías
+        # o menos se resuelven de forma exacta con solver.Solver
+        self.resolver_desde = resolver_desde
+        self.solver = Solver() if resolver_desde is not None else None
 
     def evaluar_tablero(self, tablero):
         """Evalúa el tablero considerando agrupaciones y posición."""
@@ -55,56 +95,212 @@ class Agent:
                 value += 3
         return value
 
-    def ordenar_movimientos(self, tablero, movimientos):
-        """Ordena movimientos según su evaluación heurística."""
-        return sorted(movimientos, key=lambda col: self.evaluar_tablero(self.simular_movimiento(tablero, col, self.id)), reverse=True)
+    def evaluar(self, tablero):
+        """Valor de evaluar_tablero para un Tablero, incremental si es TableroEvaluado."""
+        if isinstance(tablero, TableroEvaluado):
+            return tablero.puntuacion if self.indice == 0 else -tablero.puntuacion
+        return self.evaluar_tablero(tablero.a_lista())
+
+    def ordenar_movimientos(self, tablero, movimientos, mejor=None, jugador=None):
+        """Ordena movimientos según la estrategia configurada (por defecto, evaluación heurística)."""
+        if not isinstance(tablero, Tablero):
+            tablero = TableroEvaluado.desde_lista(tablero)
+        if jugador is None:
+            jugador = self.indice
+        return self.orden.ordenar(self, tablero, movimientos, mejor, jugador)
+
+    def minimax(self, tablero, profundidad, alpha, beta, maximizando, primera=None):
+        """Minimax sobre un Tablero; las fichas se colocan y retiran en el mismo objeto.
+
+        primera es una columna que se explora antes que las demás en este nodo.
+        """
+        if not isinstance(tablero, TableroEvaluado):
+            tablero = self.preparar_tablero(tablero)
 
-    def minimax(self, tablero, profundidad, alpha, beta, maximizando):
-        if profundidad == 0 or self.juego_terminado(tablero):
-            return self.evaluar_tablero(tablero), None
+        self.nodos += 1
+        if self.limite is not None and time.perf_counter() > self.limite:
+            raise TiempoAgotado()
+
+        if profundidad == 0 or tablero.terminado():
+            return self.evaluar(tablero), None
 
         mejor_columna = None
-        movimientos_validos = [c for c in range(7) if self.movimiento_valido(tablero, c)]
+        movimientos_validos = tablero.movimientos_validos()
         if not movimientos_validos:
             return 0, None
 
-        movimientos_ordenados = self.ordenar_movimientos(tablero, movimientos_validos)
+        mejor_tt = None
+        if self.tabla is not None:
+            alpha_inicial, beta_inicial = alpha, beta
+            clave = tablero.zobrist ^ ZOBRIST_TURNO if maximizando else tablero.zobrist
+            entrada = self.tabla.buscar(clave)
+            if entrada is not None:
+                _, prof_tt, valor_tt, tipo_tt, mejor_tt, _ = entrada
+                if prof_tt >= profundidad:
+                    if tipo_tt == EXACTO:
+                        return valor_tt, mejor_tt
+                    if tipo_tt == INFERIOR:
+                        alpha = max(alpha, valor_tt)
+                    else:
+                        beta = min(beta, valor_tt)
+                    if beta <= alpha:
+                        return valor_tt, mejor_tt
+
+        jugador = self.indice if maximizando else self.indice_oponente
+        movimientos_ordenados = self.ordenar_movimientos(tablero, movimientos_validos, mejor_tt, jugador)
+        if primera is not None and primera in movimientos_ordenados:
+            # La mejor jugada de la iteración anterior se explora primero
+            movimientos_ordenados.remove(primera)
+            movimientos_ordenados.insert(0, primera)
 
         if maximizando:
-            max_eval = -math.inf
+            mejor_eval = -math.inf
             for columna in movimientos_ordenados:
-                nuevo_tablero = self.simular_movimiento(tablero, columna, self.id)
-                evaluacion, _ = self.minimax(nuevo_tablero, profundidad-1, alpha, beta, False)
-                if evaluacion > max_eval:
-                    max_eval = evaluacion
+                tablero.jugar(columna, jugador)
+                evaluacion, _ = self.minimax(tablero, profundidad-1, alpha, beta, False)
+                tablero.deshacer()
+                if evaluacion > mejor_eval:
+                    mejor_eval = evaluacion
                     mejor_columna = columna
                 if self.alpha_beta:
                     alpha = max(alpha, evaluacion)
                     if beta <= alpha:
+                        self.orden.registrar_corte(tablero, columna, jugador, profundidad)
                         break
-            return max_eval, mejor_columna
         else:
-            min_eval = math.inf
+            mejor_eval = math.inf
             for columna in movimientos_ordenados:
-                nuevo_tablero = self.simular_movimiento(tablero, columna, self.opponent_id)
-                evaluacion, _ = self.minimax(nuevo_tablero, profundidad-1, alpha, beta, True)
-                if evaluacion < min_eval:
-                    min_eval = evaluacion
+                tablero.jugar(columna, jugador)
+                evaluacion, _ = self.minimax(tablero, profundidad-1, alpha, beta, True)
+                tablero.deshacer()
+                if evaluacion < mejor_eval:
+                    mejor_eval = evaluacion
                     mejor_columna = columna
                 if self.alpha_beta:
                     beta = min(beta, evaluacion)
                     if beta <= alpha:
+                        self.orden.registrar_corte(tablero, columna, jugador, profundidad)
                         break
-            return min_eval, mejor_columna
+
+        if self.tabla is not None:
+            if not self.alpha_beta or alpha_inicial < mejor_eval < beta_inicial:
+                tipo = EXACTO
+            elif mejor_eval <= alpha_inicial:
+                tipo = SUPERIOR
+            else:
+                tipo = INFERIOR
+            self.tabla.guardar(clave, profundidad, mejor_eval, tipo, mejor_columna)
+        return mejor_eval, mejor_columna
 
     def elegir_movimiento(self, tablero):
-        _, movimiento = self.minimax(tablero, self.depth, -math.inf, math.inf, True)
+        """Acepta tanto un Tablero como el formato de get_estado_tablero."""
+        tablero = self.preparar_tablero(tablero)
+
+        self.nodos = 0  # Nodos visitados en esta jugada
+        if self.libro is not None:
+            jugada = self.libro.buscar(tablero)
+            if jugada is not None:
+                self.profundidad_alcanzada = 0
+                self.valor_raiz = None
+                return jugada + 1
+        vacias = FILAS * COLUMNAS - tablero.num_fichas()
+        if self.solver is not None and vacias <= self.resolver_desde and not tablero.terminado():
+            nodos = self.solver.nodos
+            self.valor_raiz, movimiento = self.solver.resolver(tablero, self.indice)
+            self.nodos = self.solver.nodos - nodos
+            self.profundidad_alcanzada = vacias
+            return movimiento + 1
+        if self.tabla is not None:
+            self.tabla.nueva_busqueda()
+        if self.tiempo_ms is None and self.workers > 1:
+            self.valor_raiz, movimiento = paralelo.buscar_raiz(self, tablero, self.depth, self.workers)
+            self.profundidad_alcanzada = self.depth
+        elif self.tiempo_ms is None:
+            self.valor_raiz, movimiento = self.minimax(tablero, self.depth, -math.inf, math.inf, True)
+            self.profundidad_alcanzada = self.depth
+        else:
+            movimiento = self.profundizar(tablero)
         if movimiento is None:
-            movimientos_validos = [c for c in range(7) if self.movimiento_valido(tablero, c)]
-            return random.choice(movimientos_validos) if movimientos_validos else None
+            movimientos_validos = tablero.movimientos_validos()
+            return random.choice(movimientos_validos) + 1 if movimientos_validos else None
         
         return movimiento + 1  # Ajustar a la numeración del connect4.py
 
+    def elegir_movimientos_lote(self, tableros, workers=None, bloque=64):
+        """elegir_movimiento para muchas posiciones a la vez.
+
+        tableros es un arreglo (N, 6, 7) con 0, 1 y 2 (fila 0 arriba, como
+        get_estado_tablero) o de máscaras (N, 2) como Tablero.fichas. Devuelve
+        las columnas elegidas (1-7, 0 si la partida ya terminó) y el valor minimax de
+        cada una (nan si salió del libro). Las posiciones se reparten en
+        bloques entre workers procesos (por defecto todos los núcleos).
+        """
+        import numpy as np
+        from td_vectorizado import fichas_lote, alineado
+
+        fichas, alturas = fichas_lote(tableros)
+        movimientos = np.zeros(len(fichas), dtype=np.int8)
+        valores = np.full(len(fichas), np.nan)
+        # Las posiciones llenas o ya ganadas no tienen jugada
+        pendientes = (alturas < FILAS).any(axis=1) & ~alineado(fichas).any(axis=1)
+        if self.libro is not None:
+            libro = self.libro.buscar_lote(fichas, alturas)
+            en_libro = pendientes & (libro >= 0)
+            movimientos[en_libro] = libro[en_libro] + 1
+            pendientes &= ~en_libro
+
+        indices = np.nonzero(pendientes)[0]
+        columnas, puntajes = paralelo.elegir_lote(self, fichas[indices].tolist(), alturas[indices].tolist(),
+                                                  workers, bloque)
+        movimientos[indices] = columnas
+        valores[indices] = puntajes
+        return movimientos, valores
+
+    def preparar_tablero(self, tablero):
+        """Convierte el tablero recibido en un TableroEvaluado para la búsqueda."""
+        if isinstance(tablero, TableroEvaluado):
+            return tablero
+        if isinstance(tablero, Tablero):
+            return TableroEvaluado.desde_tablero(tablero)
+        return TableroEvaluado.desde_lista(tablero)
+
+    def profundizar(self, tablero):
+        """Profundización iterativa dentro del presupuesto de tiempo.
+
+        Cada iteración explora primero la mejor columna de la anterior y se
+        devuelve la jugada de la iteración más profunda que llegó a terminar.
+        """
+        inicio = time.perf_counter()
+        vacias = FILAS * COLUMNAS - tablero.num_fichas()
+        maxima = vacias if self.depth is None else min(self.depth, vacias)
+        jugadas = len(tablero.historial)
+        movimiento = None
+        self.profundidad_alcanzada = 0
+
+        for profundidad in range(1, max(maxima, 1) + 1):
+            # La profundidad 1 siempre se completa para tener una jugada
+            self.limite = inicio + self.tiempo_ms / 1000 if profundidad > 1 else None
+            try:
+                valor, resultado = self.minimax(tablero, profundidad, -math.inf, math.inf, True, primera=movimiento)
+            except TiempoAgotado:
+                while len(tablero.historial) > jugadas:
+                    tablero.deshacer()
+                break
+            finally:
+                self.limite = None
+            movimiento = resultado
+            self.valor_raiz = valor
+            self.profundidad_alcanzada = profundidad
+            if resultado is None or time.perf_counter() - inicio >= self.tiempo_ms / 1000:
+                break
+        return movimiento
+
+    def nueva_partida(self):
+        """Vacía la tabla de transposición y las estadísticas de ordenamiento."""
+        if self.tabla is not None:
+            self.tabla.limpiar()
+        self.orden.reiniciar()
+
     def movimiento_valido(self, tablero, columna):
         return tablero[0][columna] in (0, '0')
 
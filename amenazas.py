@@ -0,0 +1,73 @@
+from bitboard import FILAS, COLUMNAS, ALTO, ABAJO, TABLERO_COMPLETO, alineado
+
+# Detección de amenazas con operaciones de bits: las casillas donde un
+# jugador ganaría con una ficha más se obtienen en tiempo constante a partir
+# de su máscara, sin simular jugadas ni recorrer el tablero.
+
+MASCARAS_COLUMNA = [((1 << FILAS) - 1) << (col * ALTO) for col in range(COLUMNAS)]
+COLUMNA_CENTRAL = 3
+
+
+def casillas_ganadoras(propias, ocupadas):
+    """Casillas vacías donde una ficha más de propias completaría cuatro en línea."""
+    # Vertical: solo puede completarse encima de tres fichas seguidas
+    r = (propias << 1) & (propias << 2) & (propias << 3)
+    # Horizontal y diagonales: huecos al final o en medio de la línea
+    for d in (ALTO, ALTO - 1, ALTO + 1):
+        p = (propias << d) & (propias << (2 * d))
+        r |= p & (propias << (3 * d))
+        r |= p & (propias >> d)
+        p = (propias >> d) & (propias >> (2 * d))
+        r |= p & (propias << d)
+        r |= p & (propias >> (3 * d))
+    return r & (TABLERO_COMPLETO ^ ocupadas)
+
+
+def jugables(ocupadas):
+    """Casilla libre más baja de cada columna que no está llena."""
+    return (ocupadas + ABAJO) & TABLERO_COMPLETO
+
+
+def ganadoras_jugables(tablero, jugador):
+    """Casillas donde el jugador gana ya mismo si le toca mover."""
+    ocupadas = tablero.ocupadas()
+    return casillas_ganadoras(tablero.fichas[jugador], ocupadas) & jugables(ocupadas)
+
+
+def columnas_probadas(alturas):
+    """Máscara de las columnas que revisa TDAgent.calcular_recompensa.
+
+    calcular_recompensa pasa las columnas 0-6 de movimientos_validos a
+    simular_movimiento, que espera 1-7, así que por cada columna válida c
+    prueba en realidad la columna c - 1 (la 6 cuando c es 0).
+    """
+    mascara = 0
+    for col in range(COLUMNAS):
+        if alturas[col] < FILAS:
+            mascara |= MASCARAS_COLUMNA[col - 1]
+    return mascara
+
+
+def recompensa_tras_jugada(tablero, jugador, rival):
+    """Recompensa de calcular_recompensa evaluada sobre el tablero ya con la jugada hecha."""
+    propias = tablero.fichas[jugador]
+    rivales = tablero.fichas[rival]
+
+    # Verifica victoria
+    if alineado(propias):
+        return 1.0
+
+    ocupadas = tablero.ocupadas()
+    probadas = columnas_probadas(tablero.alturas)
+    libres = jugables(ocupadas) & probadas
+
+    # Verifica derrota (victoria del oponente en su próximo movimiento)
+    if (probadas and alineado(rivales)) or casillas_ganadoras(rivales, ocupadas) & libres:
+        return -1.0
+
+    # Posición de amenaza (victoria en el próximo movimiento)
+    if casillas_ganadoras(propias, ocupadas) & libres:
+        return 0.5
+
+    # Recompensa por control del centro
+    return 0.1 * bin(propias & MASCARAS_COLUMNA[COLUMNA_CENTRAL]).count('1') / FILAS
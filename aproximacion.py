@@ -0,0 +1,104 @@
+import numpy as np
+
+from bitboard import FILAS, COLUMNAS, ALTO
+from td_vectorizado import desde_claves
+
+# Ventanas de cuatro casillas (n-tuplas) del tablero: 24 horizontales, 21
+# verticales y 12 por cada diagonal. Cada una se codifica en base 3 con
+# 0 = vacía, 1 = ficha propia y 2 = ficha rival.
+VENTANAS = np.array([
+    [(col + k * dc) * ALTO + fila + k * df for k in range(4)]
+    for dc, df in ((1, 0), (0, 1), (1, 1), (1, -1))
+    for col in range(COLUMNAS)
+    for fila in range(FILAS)
+    if 0 <= col + 3 * dc < COLUMNAS and 0 <= fila + 3 * df < FILAS
+], dtype=np.uint64)
+PATRONES = 3 ** 4
+_POTENCIAS = np.array([1, 3, 9, 27])
+_DESPLAZAMIENTOS = np.arange(len(VENTANAS)) * PATRONES
+
+
+def indices_ventanas(propias, rivales):
+    """Índice del peso activo de cada ventana: arreglo (N, 69) para N tableros."""
+    bits_propios = (propias[:, None, None] >> VENTANAS) & np.uint64(1)
+    bits_rivales = (rivales[:, None, None] >> VENTANAS) & np.uint64(1)
+    patrones = (bits_propios + 2 * bits_rivales).astype(np.int64) @ _POTENCIAS
+    return patrones + _DESPLAZAMIENTOS
+
+
+class AproximadorLineal:
+    """Función de valor lineal sobre n-tuplas para TDAgent.
+
+    Q(s, a) es el valor del tablero que queda después de jugar a en s, desde
+    el punto de vista del agente: la suma de un peso por ventana de cuatro
+    casillas según su contenido, más un sesgo. Los 5589 pesos ocupan lo mismo
+    sin importar cuántas partidas se entrene, y posiciones nunca vistas
+    comparten ventanas con las conocidas.
+
+    Se entrena por lotes de transiciones con claves de Tablero.clave (sin
+    reflejar), que TDAgent toma de su memoria de repetición, con el mismo
+    objetivo de TD que actualizar_q.
+    """
+
+    def __init__(self, indice, alpha=0.005, gamma=0.9):
+        self.indice = indice
+        self.alpha = alpha
+        self.gamma = gamma
+        self.pesos = np.zeros(len(VENTANAS) * PATRONES)
+        self.sesgo = 0.0
+
+    def valor(self, propias, rivales):
+        """Valor de N tableros dados por las máscaras del agente y del rival."""
+        return self.pesos[indices_ventanas(propias, rivales)].sum(axis=1) + self.sesgo
+
+    def valores_acciones(self, fichas, alturas):
+        """Q de las 7 jugadas de N posiciones en una sola pasada: arreglo (N, 7).
+
+        Las columnas llenas quedan en -inf.
+        """
+        propias = fichas[:, self.indice]
+        rivales = fichas[:, 1 - self.indice]
+        bits = np.arange(COLUMNAS, dtype=np.uint64) * np.uint64(ALTO) + alturas.astype(np.uint64)
+        despues = propias[:, None] | (np.uint64(1) << bits)
+        valores = self.valor(despues.ravel(), np.repeat(rivales, COLUMNAS)).reshape(-1, COLUMNAS)
+        valores[alturas >= FILAS] = -np.inf
+        return valores
+
+    def valores_tablero(self, tablero):
+        """Q de las 7 jugadas de un Tablero."""
+        fichas = np.array([tablero.fichas], dtype=np.uint64)
+        alturas = np.array([tablero.alturas])
+        return self.valores_acciones(fichas, alturas)[0]
+
+    def actualizar_lote(self, claves, acciones, recompensas, claves_nuevas, terminales):
+        """Paso de TD semi-gradiente sobre un lote de transiciones; devuelve los errores de TD."""
+        fichas, alturas = desde_claves(claves)
+        fichas_nuevas, alturas_nuevas = desde_claves(claves_nuevas)
+        terminales = terminales | ((alturas_nuevas < FILAS).sum(axis=1) == 0)
+
+        q_max = np.zeros(len(claves))
+        if not terminales.all():
+            siguen = ~terminales
+            q_max[siguen] = self.valores_acciones(fichas_nuevas[siguen], alturas_nuevas[siguen]).max(axis=1)
+        objetivos = recompensas + self.gamma * q_max
+
+        filas = np.arange(len(claves))
+        bits = acciones.astype(np.uint64) * np.uint64(ALTO) + alturas[filas, acciones].astype(np.uint64)
+        propias = fichas[:, self.indice] | (np.uint64(1) << bits)
+        indices = indices_ventanas(propias, fichas[:, 1 - self.indice])
+        errores = objetivos - (self.pesos[indices].sum(axis=1) + self.sesgo)
+
+        # El paso se reparte entre las ventanas activas para que alpha tenga la
+        # misma escala que en la tabla Q
+        paso = self.alpha / (len(VENTANAS) + 1)
+        np.add.at(self.pesos, indices, paso * errores[:, None])
+        self.sesgo += paso * errores.sum()
+        return errores
+
+    def guardar(self, ruta):
+        np.savez(ruta, pesos=self.pesos, sesgo=self.sesgo)
+
+    def cargar(self, ruta):
+        with np.load(ruta) as datos:
+            self.pesos = datos['pesos']
+            self.sesgo = float(datos['sesgo'])
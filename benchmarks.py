@@ -0,0 +1,194 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+
+from agent import Agent
+from bitboard import Tablero, FILAS
+from td_agent import TDAgent
+
+# Rangos de fichas de cada conjunto de posiciones
+FASES = {"apertura": (2, 8), "medio": (12, 22), "final": (26, 34)}
+POSICIONES_POR_FASE = 20
+SEMILLA = 1234
+PROFUNDIDADES = (2, 4, 5)
+REPETICIONES = 3
+MODELO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "td_model.pkl")
+TOLERANCIA = 0.15
+
+
+def posiciones(fase, n=POSICIONES_POR_FASE, semilla=SEMILLA):
+    """Posiciones no terminadas reproducibles: jugadas al azar con una semilla fija."""
+    minimo, maximo = FASES[fase]
+    generador = random.Random(f"{semilla}-{fase}")
+    resultado = []
+    while len(resultado) < n:
+        tablero = Tablero()
+        objetivo = generador.randint(minimo, maximo)
+        while tablero.num_fichas() < objetivo and not tablero.terminado():
+            tablero.jugar(generador.choice(tablero.movimientos_validos()), tablero.num_fichas() % 2)
+        if not tablero.terminado() and not tablero.lleno():
+            resultado.append(tablero)
+    return resultado
+
+
+def _mejor_de(repeticiones, funcion):
+    """Menor tiempo de varias repeticiones, para reducir el ruido."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def medir_busqueda(profundidades=PROFUNDIDADES):
+    """Latencia por jugada y nodos por segundo de Agent.elegir_movimiento."""
+    metricas = {}
+    for fase in FASES:
+        tableros = posiciones(fase)
+        for profundidad in profundidades:
+            for alpha_beta in (False, True):
+                nodos = []
+
+                def buscar():
+                    nodos.clear()
+                    for tablero in tableros:
+                        player_id = '1' if tablero.num_fichas() % 2 == 0 else '2'
+                        agente = Agent(profundidad, player_id, alpha_beta=alpha_beta)
+                        agente.elegir_movimiento(tablero)
+                        nodos.append(agente.nodos)
+
+                segundos = _mejor_de(REPETICIONES, buscar)
+                nombre = f"busqueda.{fase}.d{profundidad}.{'alfabeta' if alpha_beta else 'minimax'}"
+                metricas[f"{nombre}.ms"] = segundos * 1000 / len(tableros)
+                metricas[f"{nombre}.nodos_por_s"] = sum(nodos) / segundos
+    return metricas
+
+
+def medir_aprendizaje(episodios=20):
+    """Episodios por segundo de TDAgent.aprender contra Minimax."""
+    random.seed(SEMILLA)
+    agente = TDAgent(player_id=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        agente.aprender(episodios=episodios)
+        segundos = time.perf_counter() - inicio
+    return {"aprender.episodios_por_s": episodios / segundos}
+
+
+def medir_funciones(repeticiones=REPETICIONES):
+    """Llamadas por segundo de check_victoria y evaluar_tablero sobre listas."""
+    tableros = [t for fase in FASES for t in posiciones(fase)]
+    listas = [t.a_lista() for t in tableros]
+    # Agent.check_victoria revisa las líneas que pasan por la última ficha
+    ultimas = [(FILAS - t.alturas[t.historial[-1][0]], t.historial[-1][0]) for t in tableros]
+    agente = Agent(1, '1')
+    agente_td = TDAgent(player_id=1)
+
+    def victorias():
+        for lista, (fila, col) in zip(listas, ultimas):
+            agente.check_victoria(lista, fila, col)
+
+    def victorias_td():
+        for lista in listas:
+            agente_td.check_victoria(lista, '1')
+
+    def evaluaciones():
+        for lista in listas:
+            agente.evaluar_tablero(lista)
+
+    def gana():
+        for tablero in tableros:
+            tablero.gana(0)
+
+    metricas = {}
+    for nombre, funcion, veces in (("check_victoria", victorias, 50), ("td_check_victoria", victorias_td, 5),
+                                    ("evaluar_tablero", evaluaciones, 5), ("tablero_gana", gana, 200)):
+        segundos = _mejor_de(repeticiones, lambda: [funcion() for _ in range(veces)])
+        metricas[f"{nombre}.llamadas_por_s"] = len(listas) * veces / segundos
+    return metricas
+
+
+def medir_modelo(archivo=MODELO):
+    """Tiempo de carga del modelo TD y memoria máxima del proceso después de cargarlo."""
+    agente = TDAgent(player_id=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        agente.cargar_modelo(archivo)
+        segundos = time.perf_counter() - inicio
+    return {
+        "modelo.carga_ms": segundos * 1000,
+        # ru_maxrss está en KB en Linux
+        "modelo.rss_max_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "modelo.estados": len(agente.q_values),
+    }
+
+
+def ejecutar(profundidades=PROFUNDIDADES):
+    metricas = {}
+    metricas.update(medir_modelo())
+    metricas.update(medir_funciones())
+    metricas.update(medir_busqueda(profundidades))
+    metricas.update(medir_aprendizaje())
+    return {
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "semilla": SEMILLA,
+        },
+        "metricas": {nombre: round(valor, 3) for nombre, valor in metricas.items()},
+    }
+
+
+def mayor_es_mejor(nombre):
+    return nombre.endswith("_por_s")
+
+
+def comparar(actual, base, tolerancia=TOLERANCIA):
+    """Lista de (métrica, base, actual, cambio) que empeoraron más que la tolerancia."""
+    regresiones = []
+    for nombre, valor_base in base["metricas"].items():
+        valor = actual["metricas"].get(nombre)
+        if valor is None or not valor_base or nombre == "modelo.estados":
+            continue
+        cambio = (valor - valor_base) / valor_base
+        empeora = -cambio if mayor_es_mejor(nombre) else cambio
+        if empeora > tolerancia:
+            regresiones.append((nombre, valor_base, valor, cambio))
+    return regresiones
+
+
+def main():
+    """Uso: python benchmarks.py [salida.json] [base.json] [tolerancia]"""
+    salida = sys.argv[1] if len(sys.argv) > 1 else "benchmarks.json"
+    base = sys.argv[2] if len(sys.argv) > 2 else None
+    tolerancia = float(sys.argv[3]) if len(sys.argv) > 3 else TOLERANCIA
+
+    resultados = ejecutar()
+    with open(salida, "w") as f:
+        json.dump(resultados, f, indent=2, sort_keys=True)
+    for nombre, valor in sorted(resultados["metricas"].items()):
+        print(f"{nombre:45} {valor:>14,.3f}")
+    print(f"Resultados guardados en {salida}")
+
+    if base:
+        with open(base) as f:
+            regresiones = comparar(resultados, json.load(f), tolerancia)
+        if not regresiones:
+            print(f"Sin regresiones mayores a {tolerancia:.0%} respecto a {base}")
+            return
+        print(f"Regresiones mayores a {tolerancia:.0%} respecto a {base}:")
+        for nombre, valor_base, valor, cambio in regresiones:
+            print(f"  {nombre}: {valor_base:,.3f} -> {valor:,.3f} ({cambio:+.1%})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import random
+
+FILAS = 6
+COLUMNAS = 7
+ALTO = FILAS + 1  # Cada columna usa un bit extra como centinela
+
+# Bit inferior de cada columna y máscara con todas las casillas jugables
+ABAJO = sum(1 << (col * ALTO) for col in range(COLUMNAS))
+TABLERO_COMPLETO = ABAJO * ((1 << FILAS) - 1)
+
+# Bits de cada fila en el orden de get_estado_tablero (fila 0 arriba)
+BITS_FILAS = [[1 << (col * ALTO + FILAS - 1 - fila) for col in range(COLUMNAS)]
+              for fila in range(FILAS)]
+
+# Números aleatorios de Zobrist por jugador y bit; la semilla fija hace que
+# las claves sean reproducibles entre procesos
+_generador = random.Random(20240229)
+ZOBRIST = [[_generador.getrandbits(64) for _ in range(COLUMNAS * ALTO)] for _ in range(2)]
+ZOBRIST_TURNO = _generador.getrandbits(64)
+
+
+def indice_jugador(player_id):
+    """Convierte el id de jugador ('1' o '2') en el índice 0 o 1."""
+    return 0 if str(player_id) == '1' else 1
+
+
+def alineado(mascara):
+    """Indica si la máscara contiene cuatro fichas en línea."""
+    # Vertical, horizontal y las dos diagonales
+    for desplazamiento in (1, ALTO, ALTO - 1, ALTO + 1):
+        m = mascara & (mascara >> desplazamiento)
+        if m & (m >> (2 * desplazamiento)):
+            return True
+    return False
+
+
+def espejar_clave(clave):
+    """Refleja de izquierda a derecha una clave de Tablero.clave."""
+    espejo = 0
+    for col in range(COLUMNAS):
+        espejo |= ((clave >> (col * ALTO)) & ((1 << ALTO) - 1)) << ((COLUMNAS - 1 - col) * ALTO)
+    return espejo
+
+
+class Tablero:
+    """Posición de Connect 4 guardada como dos máscaras de bits y alturas por columna.
+
+    El bit de la casilla (columna, fila) es columna * ALTO + fila, contando
+    las filas desde abajo. fichas[0] pertenece al jugador '1' y fichas[1]
+    al jugador '2'.
+    """
+
+    __slots__ = ('fichas', 'alturas', 'historial', 'zobrist')
+
+    def __init__(self):
+        self.fichas = [0, 0]
+        self.alturas = [0] * COLUMNAS
+        self.historial = []
+        self.zobrist = 0  # Hash de Zobrist actualizado en cada jugada
+
+    @classmethod
+    def desde_lista(cls, tablero):
+        """Construye la posición a partir del formato de get_estado_tablero."""
+        posicion = cls()
+        for col in range(COLUMNAS):
+            for fila in range(FILAS - 1, -1, -1):
+                celda = tablero[fila][col]
+                if celda in (0, '0'):
+                    break
+                altura = posicion.alturas[col]
+                jugador = indice_jugador(celda)
+                posicion.fichas[jugador] |= 1 << (col * ALTO + altura)
+                posicion.zobrist ^= ZOBRIST[jugador][col * ALTO + altura]
+                posicion.alturas[col] = altura + 1
+        return posicion
+
+    @classmethod
+    def desde_mascaras(cls, fichas, alturas):
+        """Construye la posición a partir de las dos máscaras y las alturas."""
+        posicion = cls()
+        posicion.fichas = list(fichas)
+        posicion.alturas = list(alturas)
+        for jugador in (0, 1):
+            mascara = fichas[jugador]
+            while mascara:
+                bit = (mascara & -mascara).bit_length() - 1
+                posicion.zobrist ^= ZOBRIST[jugador][bit]
+                mascara &= mascara - 1
+        return posicion
+
+    def a_lista(self):
+        """Devuelve el tablero en el formato de get_estado_tablero."""
+        uno, dos = self.fichas
+        return [['1' if uno & bit else '2' if dos & bit else 0 for bit in fila]
+                for fila in BITS_FILAS]
+
+    def copiar(self):
+        posicion = Tablero()
+        posicion.fichas = list(self.fichas)
+        posicion.alturas = list(self.alturas)
+        posicion.historial = list(self.historial)
+        posicion.zobrist = self.zobrist
+        return posicion
+
+    def ocupadas(self):
+        return self.fichas[0] | self.fichas[1]
+
+    def clave(self):
+        """Entero único de 49 bits para la posición.
+
+        En cada columna quedan las fichas del jugador '1' más un bit justo
+        encima de la última ficha, que marca la altura.
+        """
+        return self.fichas[0] + self.ocupadas() + ABAJO
+
+    def clave_canonica(self):
+        """Devuelve (clave, espejada) con la menor clave entre la posición y su reflejo."""
+        clave = self.clave()
+        espejo = espejar_clave(clave)
+        if espejo < clave:
+            return espejo, True
+        return clave, False
+
+    def puede_jugar(self, columna):
+        return self.alturas[columna] < FILAS
+
+    def movimientos_validos(self):
+        """Devuelve las columnas (0-6) que aún admiten fichas."""
+        return [col for col in range(COLUMNAS) if self.alturas[col] < FILAS]
+
+    def jugar(self, columna, jugador):
+        """Coloca una ficha del jugador (0 o 1) en la columna indicada."""
+        bit = columna * ALTO + self.alturas[columna]
+        self.fichas[jugador] |= 1 << bit
+        self.zobrist ^= ZOBRIST[jugador][bit]
+        self.alturas[columna] += 1
+        self.historial.append((columna, jugador))
+
+    def deshacer(self):
+        """Retira la última ficha colocada."""
+        columna, jugador = self.historial.pop()
+        self.alturas[columna] -= 1
+        bit = columna * ALTO + self.alturas[columna]
+        self.fichas[jugador] ^= 1 << bit
+        self.zobrist ^= ZOBRIST[jugador][bit]
+        return columna, jugador
+
+    def gana(self, jugador):
+        return alineado(self.fichas[jugador])
+
+    def terminado(self):
+        """Indica si alguno de los jugadores tiene cuatro en línea."""
+        return alineado(self.fichas[0]) or alineado(self.fichas[1])
+
+    def lleno(self):
+        return self.ocupadas() == TABLERO_COMPLETO
+
+    def num_fichas(self):
+        return sum(self.alturas)
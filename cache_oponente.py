@@ -0,0 +1,162 @@
+import sqlite3
+import sys
+import zlib
+from collections import OrderedDict
+
+from bitboard import Tablero
+
+
+def configuracion(agente):
+    """Cadena que identifica la búsqueda del agente; forma parte de la clave del cache."""
+    if agente.tiempo_ms is not None:
+        raise ValueError("Con tiempo_ms la jugada depende del tiempo y no se puede guardar en cache")
+    tabla = agente.tabla.tamano if agente.tabla is not None else 0
+    orden = '+'.join(sorted(agente.orden.estrategias))
+    # El libro se identifica por su contenido: otro libro puede dar otras jugadas
+    libro = 0
+    if agente.libro is not None:
+        suma = zlib.crc32(agente.libro.columnas.tobytes(), zlib.crc32(agente.libro.claves.tobytes()))
+        libro = f"{agente.libro.jugadas}:{len(agente.libro)}:{suma:08x}"
+    return (f"id={agente.id} depth={agente.depth} alpha_beta={int(agente.alpha_beta)} orden={orden} tt={tabla} "
+            f"libro={libro} resolver={agente.resolver_desde}")
+
+
+class CacheMovimientos:
+    """Envuelve un Agent y recuerda la jugada que elige en cada posición.
+
+    Las jugadas se guardan en un LRU en memoria y, si se da un archivo, en
+    una tabla de SQLite que se conserva entre ejecuciones. La clave es la
+    posición exacta (Tablero.clave) más la configuración de búsqueda: no se
+    usa la clave reflejada porque los desempates de minimax dependen del
+    orden de las columnas y la jugada de una posición reflejada no siempre es
+    el reflejo de la jugada.
+
+    Tiene el mismo elegir_movimiento que Agent, así que puede usarse como
+    oponente en TDAgent.aprender o en EntrenadorVectorizado.
+    """
+
+    def __init__(self, agente, archivo=None, capacidad=200000):
+        self.agente = agente
+        self.id = agente.id
+        self.config = configuracion(agente)
+        self.capacidad = capacidad
+        self.memoria = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self._pendientes = []
+        self.conexion = None
+        if archivo:
+            self.conexion = sqlite3.connect(archivo)
+            self.conexion.execute(
+                "CREATE TABLE IF NOT EXISTS movimientos ("
+                "config TEXT, clave INTEGER, columna INTEGER, PRIMARY KEY (config, clave))"
+            )
+
+    def _buscar_disco(self, clave):
+        if self.conexion is None:
+            return None
+        fila = self.conexion.execute(
+            "SELECT columna FROM movimientos WHERE config = ? AND clave = ?", (self.config, clave)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def _recordar(self, clave, columna):
+        self.memoria[clave] = columna
+        if len(self.memoria) > self.capacidad:
+            self.memoria.popitem(last=False)
+
+    def elegir_movimiento(self, tablero):
+        """Devuelve la jugada del agente (1-7), buscándola solo si no está en cache."""
+        if not isinstance(tablero, Tablero):
+            tablero = Tablero.desde_lista(tablero)
+        clave = tablero.clave()
+
+        columna = self.memoria.get(clave)
+        if columna is not None:
+            self.memoria.move_to_end(clave)
+            self.aciertos += 1
+            return columna
+
+        columna = self._buscar_disco(clave)
+        if columna is not None:
+            self.aciertos += 1
+        else:
+            self.fallos += 1
+            columna = self.agente.elegir_movimiento(tablero)
+            if columna is None:
+                return None
+            if self.conexion is not None:
+                self._pendientes.append((self.config, clave, columna))
+                if len(self._pendientes) >= 1000:
+                    self.guardar()
+        self._recordar(clave, columna)
+        return columna
+
+    def nueva_partida(self):
+        if hasattr(self.agente, "nueva_partida"):
+            self.agente.nueva_partida()
+
+    def guardar(self):
+        """Escribe en disco las jugadas nuevas."""
+        if self.conexion is None or not self._pendientes:
+            return
+        self.conexion.executemany("INSERT OR REPLACE INTO movimientos VALUES (?, ?, ?)", self._pendientes)
+        self.conexion.commit()
+        self._pendientes = []
+
+    def cerrar(self):
+        self.guardar()
+        if self.conexion is not None:
+            self.conexion.close()
+            self.conexion = None
+
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def precalcular(self, turnos=4, empieza_oponente=False):
+        """Llena el cache con las posiciones que aparecen al entrenar contra este agente.
+
+        Recorre todas las jugadas posibles del otro jugador y, en cada
+        posición, la respuesta del agente, hasta turnos jugadas del agente.
+        Son a lo sumo 7 ** turnos posiciones (unas 2400 con turnos=4).
+        """
+        indice = 0 if self.id == '1' else 1
+        nivel = [Tablero()]
+        for turno in range(turnos):
+            siguiente = {}  # Sin repetir posiciones a las que se llega por distinto orden
+            for tablero in nivel:
+                hijos = [tablero] if empieza_oponente and turno == 0 else []
+                if not hijos:
+                    for columna in tablero.movimientos_validos():
+                        hijo = tablero.copiar()
+                        hijo.jugar(columna, 1 - indice)
+                        if not hijo.gana(1 - indice):
+                            hijos.append(hijo)
+                for hijo in hijos:
+                    if hijo.lleno():
+                        continue
+                    columna = self.elegir_movimiento(hijo)
+                    hijo.jugar(columna - 1, indice)
+                    if not hijo.terminado():
+                        siguiente[hijo.clave()] = hijo
+            nivel = list(siguiente.values())
+            print(f"Turno {turno + 1}/{turnos}: {len(self.memoria)} posiciones en cache")
+        self.guardar()
+
+
+def main():
+    """Uso: python cache_oponente.py archivo.sqlite [turnos] [profundidad]"""
+    from agent import Agent
+
+    archivo = sys.argv[1] if len(sys.argv) > 1 else "cache_oponente.sqlite"
+    turnos = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    profundidad = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    # El mismo oponente que usa TDAgent.aprender con un agente que juega como '1'
+    cache = CacheMovimientos(Agent(depth=profundidad, player_id='2', alpha_beta=False), archivo)
+    cache.precalcular(turnos)
+    cache.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import json
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+
+from tabla_q import TablaQ, ACCIONES
+
+# Formato de un segmento: cabecera de 16 bytes (MAGIA, versión, número de
+# estados) seguida de las claves int64[n] y los valores float32[n, 7]
+MAGIA = b'C4D1'
+VERSION = 1
+CABECERA = 16
+ESTADO = "estado.json"
+BASE = "base.c4q"
+
+
+def escribir_segmento(ruta, claves, valores):
+    cabecera = np.zeros(CABECERA, dtype=np.uint8)
+    cabecera[:4] = np.frombuffer(MAGIA, dtype=np.uint8)
+    cabecera[4:8] = np.frombuffer(np.uint32(VERSION).tobytes(), dtype=np.uint8)
+    cabecera[8:16] = np.frombuffer(np.uint64(len(claves)).tobytes(), dtype=np.uint8)
+    with open(ruta, 'wb') as f:
+        f.write(cabecera.tobytes())
+        f.write(np.ascontiguousarray(claves, dtype=np.int64).tobytes())
+        f.write(np.ascontiguousarray(valores, dtype=np.float32).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def leer_segmento(ruta):
+    with open(ruta, 'rb') as f:
+        cabecera = f.read(CABECERA)
+    if cabecera[:4] != MAGIA:
+        raise ValueError(f"{ruta} no es un segmento de checkpoint")
+    n = int(np.frombuffer(cabecera[8:16], dtype=np.uint64)[0])
+    claves = np.fromfile(ruta, dtype=np.int64, count=n, offset=CABECERA)
+    valores = np.fromfile(ruta, dtype=np.float32, count=n * ACCIONES,
+                          offset=CABECERA + 8 * n).reshape(n, ACCIONES)
+    return claves, valores
+
+
+def _escribir_json(ruta, datos):
+    """Escritura atómica: el archivo anterior sigue válido hasta el os.replace."""
+    temporal = ruta + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(datos, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+
+def leer_estado(directorio):
+    ruta = os.path.join(directorio, ESTADO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta) as f:
+        return json.load(f)
+
+
+def cargar(directorio):
+    """Reconstruye la tabla del último checkpoint; devuelve (TablaQ, estado) o (None, None)."""
+    estado = leer_estado(directorio)
+    if estado is None:
+        return None, None
+    if estado["base"]:
+        tabla = TablaQ.cargar(os.path.join(directorio, estado["base"]))
+    else:
+        tabla = TablaQ()
+    for segmento in estado["segmentos"]:
+        claves, valores = leer_segmento(os.path.join(directorio, segmento))
+        # Los segmentos guardan valores completos, así que aplicarlos en orden
+        # deja el último valor de cada estado
+        indices = tabla.indices(claves)
+        tabla.valores[indices] = valores
+    return tabla, estado
+
+
+class Checkpoints:
+    """Checkpoints incrementales de una TablaQ escritos desde un hilo aparte.
+
+    Cada checkpoint es un segmento que solo tiene los estados modificados
+    desde el anterior, así que guardar cuesta lo mismo aunque la tabla sea
+    grande. estado.json lista la base y los segmentos vigentes junto con el
+    estado del entrenamiento (episodio, epsilon) y se reemplaza de forma
+    atómica después de escribir cada segmento, así que una interrupción deja
+    siempre el último checkpoint completo. Cuando hay max_segmentos, el hilo
+    los combina con la base en una nueva base (compactación).
+
+    guardar no bloquea salvo que ya haya pendientes segmentos en cola.
+    """
+
+    def __init__(self, directorio, max_segmentos=8, pendientes=2, reiniciar=False):
+        self.directorio = directorio
+        self.max_segmentos = max_segmentos
+        os.makedirs(directorio, exist_ok=True)
+        if reiniciar:
+            self.borrar()
+        self.estado = leer_estado(directorio) or {"base": None, "segmentos": [], "siguiente": 0}
+        self.cola = queue.Queue(maxsize=pendientes)
+        self.error = None
+        self.hilo = threading.Thread(target=self._trabajar, daemon=True)
+        self.hilo.start()
+
+    def vacio(self):
+        return not self.estado["base"] and not self.estado["segmentos"]
+
+    def borrar(self):
+        """Elimina los checkpoints del directorio."""
+        estado = leer_estado(self.directorio)
+        if estado is None:
+            return
+        os.remove(os.path.join(self.directorio, ESTADO))
+        for nombre in estado["segmentos"] + ([estado["base"]] if estado["base"] else []):
+            ruta = os.path.join(self.directorio, nombre)
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    def guardar(self, claves, valores, datos):
+        """Encola un segmento con las claves y valores modificados y los datos del entrenamiento."""
+        if self.error is not None:
+            raise self.error
+        self.cola.put((claves, valores, datos))
+
+    def cerrar(self):
+        """Espera a que se escriban los segmentos pendientes."""
+        self.cola.put(None)
+        self.hilo.join()
+        if self.error is not None:
+            raise self.error
+
+    def _trabajar(self):
+        while True:
+            trabajo = self.cola.get()
+            if trabajo is None:
+                return
+            if self.error is not None:
+                continue
+            try:
+                self._escribir(*trabajo)
+            except Exception as e:
+                self.error = e
+
+    def _escribir(self, claves, valores, datos):
+        estado = dict(self.estado)
+        nombre = f"segmento-{estado['siguiente']:06d}.c4d"
+        escribir_segmento(os.path.join(self.directorio, nombre), claves, valores)
+        estado.update(datos)
+        estado["segmentos"] = estado["segmentos"] + [nombre]
+        estado["siguiente"] += 1
+        _escribir_json(os.path.join(self.directorio, ESTADO), estado)
+        self.estado = estado
+        if len(estado["segmentos"]) >= self.max_segmentos:
+            self.compactar()
+
+    def compactar(self):
+        """Combina la base y los segmentos en una base nueva y borra los segmentos."""
+        tabla, estado = cargar(self.directorio)
+        temporal = os.path.join(self.directorio, BASE + ".tmp")
+        tabla.guardar(temporal)
+        os.replace(temporal, os.path.join(self.directorio, BASE))
+        # Si se interrumpe aquí, estado.json aún lista los segmentos y volver
+        # a aplicarlos sobre la base nueva da la misma tabla
+        viejos = estado["segmentos"]
+        estado = dict(estado, base=BASE, segmentos=[])
+        _escribir_json(os.path.join(self.directorio, ESTADO), estado)
+        self.estado = estado
+        for nombre in viejos:
+            os.remove(os.path.join(self.directorio, nombre))
+
+
+def main():
+    """Uso: python checkpoints.py directorio salida.c4q (exporta el último checkpoint como modelo)"""
+    directorio, salida = sys.argv[1], sys.argv[2]
+    tabla, estado = cargar(directorio)
+    if tabla is None:
+        print(f"No hay checkpoints en {directorio}")
+        return
+    tabla.guardar(salida)
+    print(f"Episodio {estado['episodio']}, epsilon {estado['epsilon']:.3f}: "
+          f"{len(tabla)} estados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,47 @@
-import turtle
 import os
 from agent import Agent
+from motor import Motor, JUGADA, DESHACER, REINICIO
 from player import Player
 
+# turtle (y con él Tk) solo se importa cuando se usa la interfaz gráfica, así
+# que las partidas sin interfaz funcionan en servidores sin pantalla
+
 class Connect4:
     def __init__(self, usar_turtle=True):
         self.usar_turtle = usar_turtle
 
         if self.usar_turtle:
+            import turtle
             self.tablero = turtle.Turtle()
             self.circulo = turtle.Turtle()
         else:
             self.tablero = None
             self.circulo = None
 
-        self.espaciosY = [0] * 8
-        self.player1Pos = set()
-        self.player2Pos = set()
+        # El estado de la partida vive en el motor; la vista dibuja a partir de sus eventos
+        self.motor = Motor()
+        self.motor.suscribir(self.al_mover)
         self.coordenadasX = {i: -300 + (i - 1) * 100 for i in range(1, 8)}
         self.coordenadasY = {i: -300 + (i - 1) * 100 for i in range(1, 7)}
         self.player1 = None
         self.player2 = None
         self.jugador_actual = None
 
+    @property
+    def posicion(self):
+        """Tablero del motor, sin copiar; los agentes lo reciben directamente."""
+        return self.motor.tablero
+
+    @property
+    def espaciosY(self):
+        """Fichas por columna, indexadas de 1 a 7 como antes."""
+        return [0] + self.motor.tablero.alturas
+
     def crear_tablero(self):
         if not self.usar_turtle:
             return
 
+        import turtle
         self.tablero = turtle.Turtle()
         self.tablero.ht()
         self.tablero.width(10)
@@ -63,26 +78,25 @@ class Connect4:
             self.tablero.write(str(i + 1), font=("Arial", 20))
 
     def colocar_ficha(self, columna):
-        if self.espaciosY[columna] >= 6:
-            print("Columna llena. Escoge otra.")
+        if not self.motor.es_valida(columna):
+            if self.motor.terminado():
+                print("La partida ya terminó.")
+            elif not isinstance(columna, int):
+                print(f"Columna inválida: {columna!r}. Escoge un número.")
+            elif not 1 <= columna <= 7:
+                print(f"Columna fuera de rango: {columna}. Escoge entre 1 y 7.")
+            else:
+                print("Columna llena. Escoge otra.")
             return False
 
-        fila = self.espaciosY[columna] + 1
-        self.espaciosY[columna] += 1
-        x, y = self.coordenadasX[columna], self.coordenadasY[fila]
-
-        if self.jugador_actual == self.player1:
-            self.player1Pos.add((columna, fila))
-        else:
-            self.player2Pos.add((columna, fila))
-
-        self.dibujar_ficha(x, y, self.jugador_actual.color)
+        self.motor.jugar(columna)
 
         nombre = self.jugador_actual.nombre_agente
 
-        if self.verificar_victoria(columna, fila, self.jugador_actual):
+        if self.motor.ganador is not None:
             print(f"¡Gana {nombre}!")
             if self.usar_turtle:
+                import turtle
                 turtle.textinput("Mensaje", f"¡Gana {nombre}!\nPresiona 'OK' para salir")
             self.reiniciar_juego()
             return True
@@ -90,6 +104,22 @@ class Connect4:
         self.jugador_actual = self.player2 if self.jugador_actual == self.player1 else self.player1
         return False
 
+    def al_mover(self, evento, columna, fila, jugador):
+        """Oyente de los eventos del motor: dibuja las fichas nuevas."""
+        if not self.usar_turtle:
+            return
+        if evento == JUGADA:
+            color = (self.player1 if jugador == 0 else self.player2).color
+            self.dibujar_ficha(self.coordenadasX[columna], self.coordenadasY[fila], color)
+        elif evento in (DESHACER, REINICIO):
+            # turtle no borra figuras sueltas, así que se redibujan las fichas restantes
+            self.circulo.clear()
+            alturas = [0] * 7
+            for col, jugador in self.motor.tablero.historial:
+                alturas[col] += 1
+                color = (self.player1 if jugador == 0 else self.player2).color
+                self.dibujar_ficha(self.coordenadasX[col + 1], self.coordenadasY[alturas[col]], color)
+
     def dibujar_ficha(self, x, y, color):
         if not self.usar_turtle:
             return
@@ -106,21 +136,7 @@ class Connect4:
         self.circulo.end_fill()
 
     def verificar_victoria(self, col, fila, jugador):
-        posiciones = self.player1Pos if jugador == self.player1 else self.player2Pos
-
-        def check(dx, dy):
-            count = 1
-            for d in (-1, 1):
-                for i in range(1, 4):
-                    if (col + dx * i * d, fila + dy * i * d) in posiciones:
-                        count += 1
-                    else:
-                        break
-            return count >= 4
-
-        return any(
-            check(dx, dy) for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]
-        )
+        return self.posicion.gana(0 if jugador == self.player1 else 1)
 
     def play(self, player1=None, player2=None):
         self.player1 = player1
@@ -130,10 +146,19 @@ class Connect4:
         self.crear_tablero()
 
         while True:
+            if self.motor.terminado():
+                # Con el tablero lleno no quedan jugadas: los agentes devolverían None
+                print("¡Empate!")
+                if self.usar_turtle:
+                    import turtle
+                    turtle.textinput("Mensaje", "¡Empate!\nPresiona 'OK' para salir")
+                self.reiniciar_juego()
+                break
             try:
                 if self.jugador_actual.agent:
-                    columna = self.jugador_actual.agent.elegir_movimiento(self.get_estado_tablero())
+                    columna = self.jugador_actual.agent.elegir_movimiento(self.posicion)
                 else:
+                    import turtle
                     columna = int(turtle.numinput(
                         f"Turno {self.jugador_actual.color}",
                         "Ingrese columna (1-7)",
@@ -147,18 +172,12 @@ class Connect4:
                 break
 
     def get_estado_tablero(self):
-        tablero = [[0 for _ in range(7)] for _ in range(6)]
-        for (c, f) in self.player1Pos:
-            tablero[6 - f][c - 1] = "1"
-        for (c, f) in self.player2Pos:
-            tablero[6 - f][c - 1] = "2"
-        return tablero
+        """Copia del tablero como lista de listas; los agentes pueden recibir self.posicion."""
+        return self.posicion.a_lista()
 
     def reiniciar_juego(self):
         """Elimina todos los dibujos en la pantalla y resetea las posiciones."""
-        self.tablero.clear()
-        self.circulo.clear()
-        self.espaciosY = [0] * 8
-        self.player1Pos.clear()
-        self.player2Pos.clear()
+        if self.usar_turtle:
+            self.tablero.clear()
+        self.motor.reiniciar()
         self.jugador_actual = None
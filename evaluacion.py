@@ -0,0 +1,172 @@
+from bitboard import Tablero, FILAS, COLUMNAS, ALTO
+
+# La heurística de Agent.evaluar_tablero puntúa cada ficha según la racha que
+# forma en cada dirección, así que la puntuación total es la suma de lo que
+# aporta cada línea del tablero (filas, columnas y diagonales) más el control
+# del centro. Cada línea se codifica en base 3 (0 vacía, 1 jugador '1',
+# 2 jugador '2') y su aporte se precalcula para todos los códigos posibles.
+
+
+def _lineas():
+    """Devuelve las líneas del tablero como listas de bits, de un extremo al otro."""
+    lineas = []
+    for fila in range(FILAS):
+        lineas.append([(col, fila) for col in range(COLUMNAS)])
+    for col in range(COLUMNAS):
+        lineas.append([(col, fila) for fila in range(FILAS)])
+    for inicio in range(-(FILAS - 1), COLUMNAS):
+        lineas.append([(col, col - inicio) for col in range(COLUMNAS) if 0 <= col - inicio < FILAS])
+        lineas.append([(col, inicio + FILAS - 1 - col) for col in range(COLUMNAS)
+                       if 0 <= inicio + FILAS - 1 - col < FILAS])
+    return [[col * ALTO + fila for col, fila in linea] for linea in lineas if len(linea) > 1]
+
+
+def _puntuar_linea(celdas):
+    """Aporte de una línea desde el punto de vista del jugador '1'.
+
+    Reproduce Agent.evaluar_posicion restringido a una dirección.
+    """
+    total = 0
+    for i, jugador in enumerate(celdas):
+        if jugador == 0:
+            continue
+        count = 1
+        vacios = 0
+        for paso in (1, -1):
+            j = i + paso
+            while 0 <= j < len(celdas):
+                if celdas[j] == jugador:
+                    count += 1
+                elif celdas[j] == 0:
+                    vacios += 1
+                    break
+                else:
+                    break
+                j += paso
+        if count >= 4:
+            valor = 1000
+        elif count == 3 and vacios >= 1:
+            valor = 10
+        elif count == 2 and vacios >= 2:
+            valor = 3
+        else:
+            valor = 0
+        total += valor if jugador == 1 else -valor
+    return total
+
+
+def _tabla_longitud(longitud):
+    tabla = []
+    for codigo in range(3 ** longitud):
+        celdas = []
+        for _ in range(longitud):
+            celdas.append(codigo % 3)
+            codigo //= 3
+        tabla.append(_puntuar_linea(celdas))
+    return tabla
+
+
+LINEAS = _lineas()
+_TABLAS_POR_LONGITUD = {longitud: _tabla_longitud(longitud)
+                        for longitud in set(len(linea) for linea in LINEAS)}
+TABLAS = [_TABLAS_POR_LONGITUD[len(linea)] for linea in LINEAS]
+
+# Para cada bit, las líneas que lo contienen y la potencia de 3 de su posición
+LINEAS_POR_BIT = [[] for _ in range(COLUMNAS * ALTO)]
+for _indice, _linea in enumerate(LINEAS):
+    for _posicion, _bit in enumerate(_linea):
+        LINEAS_POR_BIT[_bit].append((_indice, 3 ** _posicion))
+
+COLUMNA_CENTRAL = 3
+PESO_CENTRO = 3
+
+
+class TableroEvaluado(Tablero):
+    """Tablero que mantiene la heurística de Agent.evaluar_tablero al jugar y deshacer.
+
+    puntuacion está expresada desde el punto de vista del jugador '1'; para el
+    jugador '2' basta con cambiarle el signo.
+    """
+
+    __slots__ = ('codigos', 'puntuacion', 'deltas')
+
+    def __init__(self):
+        super().__init__()
+        self.codigos = [0] * len(LINEAS)
+        self.puntuacion = 0
+        self.deltas = []
+
+    @classmethod
+    def desde_lista(cls, tablero):
+        posicion = super().desde_lista(tablero)
+        posicion.recalcular()
+        return posicion
+
+    @classmethod
+    def desde_mascaras(cls, fichas, alturas):
+        posicion = super().desde_mascaras(fichas, alturas)
+        posicion.recalcular()
+        return posicion
+
+    @classmethod
+    def desde_tablero(cls, tablero):
+        """Copia un Tablero cualquiera y calcula su puntuación."""
+        posicion = cls()
+        posicion.fichas = list(tablero.fichas)
+        posicion.alturas = list(tablero.alturas)
+        posicion.historial = list(tablero.historial)
+        posicion.zobrist = tablero.zobrist
+        posicion.recalcular()
+        return posicion
+
+    def copiar(self):
+        return TableroEvaluado.desde_tablero(self)
+
+    def recalcular(self):
+        """Recalcula códigos y puntuación a partir de las máscaras."""
+        uno, dos = self.fichas
+        self.codigos = []
+        self.puntuacion = 0
+        for linea, tabla in zip(LINEAS, TABLAS):
+            codigo = 0
+            for potencia, bit in enumerate(linea):
+                if uno >> bit & 1:
+                    codigo += 3 ** potencia
+                elif dos >> bit & 1:
+                    codigo += 2 * 3 ** potencia
+            self.codigos.append(codigo)
+            self.puntuacion += tabla[codigo]
+        central = ((1 << FILAS) - 1) << (COLUMNA_CENTRAL * ALTO)
+        self.puntuacion += PESO_CENTRO * (bin(uno & central).count('1') - bin(dos & central).count('1'))
+        self.deltas = []
+
+    def jugar(self, columna, jugador):
+        bit = columna * ALTO + self.alturas[columna]
+        Tablero.jugar(self, columna, jugador)
+        codigos = self.codigos
+        digito = jugador + 1
+        delta = 0
+        for linea, potencia in LINEAS_POR_BIT[bit]:
+            anterior = codigos[linea]
+            nuevo = anterior + potencia * digito
+            codigos[linea] = nuevo
+            tabla = TABLAS[linea]
+            delta += tabla[nuevo] - tabla[anterior]
+        if columna == COLUMNA_CENTRAL:
+            delta += PESO_CENTRO if jugador == 0 else -PESO_CENTRO
+        self.puntuacion += delta
+        self.deltas.append(delta)
+
+    def deshacer(self):
+        columna, jugador = Tablero.deshacer(self)
+        if not self.deltas:
+            # Jugada anterior a la creación de este objeto
+            self.recalcular()
+            return columna, jugador
+        bit = columna * ALTO + self.alturas[columna]
+        codigos = self.codigos
+        digito = jugador + 1
+        for linea, potencia in LINEAS_POR_BIT[bit]:
+            codigos[linea] -= potencia * digito
+        self.puntuacion -= self.deltas.pop()
+        return columna, jugador
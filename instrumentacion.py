@@ -0,0 +1,151 @@
+import json
+import time
+from collections import Counter, defaultdict
+
+# Métodos que se cuentan y se miden si el agente los tiene
+METODOS = (
+    "minimax",
+    "evaluar",
+    "evaluar_tablero",
+    "ordenar_movimientos",
+    "simular_movimiento",
+    "calcular_recompensa",
+    "recompensa_tras_jugada",
+    "actualizar_q_clave",
+    "repasar",
+)
+
+
+class Instrumentacion:
+    """Contadores y tiempos por jugada para Agent y TDAgent.
+
+    instrumentar reemplaza los métodos de METODOS y elegir_movimiento por
+    versiones que cuentan llamadas y miden tiempo, pero solo en ese objeto
+    (como atributos de instancia) y solo hasta desinstrumentar; los agentes
+    sin instrumentar siguen llamando directamente a los métodos de su clase,
+    así que no pagan ningún costo. Los cortes alfa-beta se cuentan en
+    orden.registrar_corte.
+
+    Cada jugada produce un registro con nodos, cortes, evaluaciones,
+    profundidad alcanzada, tiempo, nodos por segundo y factor de ramificación
+    efectivo (nodos ** (1 / profundidad)). Los registros se guardan en
+    self.registros y, si se da un archivo, como líneas JSON.
+    """
+
+    def __init__(self, archivo=None):
+        self.registros = []
+        self.contadores = Counter()
+        self.tiempos = defaultdict(float)
+        self.archivo = archivo
+        self._activos = Counter()
+        self._jugadas = Counter()
+
+    def _envolver(self, nombre, funcion):
+        contadores, tiempos, activos = self.contadores, self.tiempos, self._activos
+
+        def envuelta(*args, **kwargs):
+            contadores[nombre] += 1
+            # En llamadas recursivas solo se mide la más externa
+            if activos[nombre]:
+                return funcion(*args, **kwargs)
+            activos[nombre] += 1
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                tiempos[nombre] += time.perf_counter() - inicio
+                activos[nombre] -= 1
+
+        return envuelta
+
+    def instrumentar(self, agente, nombre=None):
+        """Envuelve los métodos del agente; nombre identifica sus registros."""
+        nombre = nombre or type(agente).__name__
+        for metodo in METODOS:
+            if hasattr(agente, metodo):
+                setattr(agente, metodo, self._envolver(metodo, getattr(agente, metodo)))
+        orden = getattr(agente, "orden", None)
+        if orden is not None:
+            orden.registrar_corte = self._envolver("cortes", orden.registrar_corte)
+
+        elegir = agente.elegir_movimiento
+
+        def elegir_movimiento(tablero):
+            antes = Counter(self.contadores)
+            inicio = time.perf_counter()
+            columna = elegir(tablero)
+            self.registrar(agente, nombre, columna, time.perf_counter() - inicio, self.contadores - antes)
+            return columna
+
+        agente.elegir_movimiento = elegir_movimiento
+        return agente
+
+    def desinstrumentar(self, agente):
+        """Devuelve al agente sus métodos originales."""
+        for metodo in METODOS + ("elegir_movimiento",):
+            agente.__dict__.pop(metodo, None)
+        orden = getattr(agente, "orden", None)
+        if orden is not None:
+            orden.__dict__.pop("registrar_corte", None)
+
+    def registrar(self, agente, nombre, columna, segundos, conteo):
+        nodos = conteo["minimax"]
+        self._jugadas[nombre] += 1
+        profundidad = getattr(agente, "profundidad_alcanzada", 0)
+        registro = {
+            "agente": nombre,
+            "jugada": self._jugadas[nombre],
+            "columna": columna,
+            "tiempo_ms": round(segundos * 1000, 3),
+            "nodos": nodos,
+            "cortes": conteo["cortes"],
+            "evaluaciones": conteo["evaluar"] + conteo["evaluar_tablero"],
+            "ordenamientos": conteo["ordenar_movimientos"],
+            "profundidad": profundidad if nodos else 0,
+            "nodos_por_s": round(nodos / segundos) if segundos > 0 else 0,
+            "ramificacion": round(nodos ** (1 / profundidad), 3) if nodos > 1 and profundidad else 0.0,
+        }
+        self.registros.append(registro)
+        if self.archivo:
+            with open(self.archivo, "a") as f:
+                f.write(json.dumps(registro) + "\n")
+
+    def resumen(self):
+        """Resumen de los registros y tiempos acumulados por método."""
+        datos = resumir(self.registros)
+        datos["metodos"] = {
+            metodo: {"llamadas": self.contadores[metodo], "segundos": round(self.tiempos[metodo], 6)}
+            for metodo in sorted(self.contadores)
+        }
+        return datos
+
+
+def resumir(registros):
+    """Agrega registros por jugada (de uno o varios agentes) por nombre de agente."""
+    por_agente = defaultdict(list)
+    for registro in registros:
+        por_agente[registro["agente"]].append(registro)
+
+    agentes = {}
+    for nombre, lista in por_agente.items():
+        nodos = sum(r["nodos"] for r in lista)
+        segundos = sum(r["tiempo_ms"] for r in lista) / 1000
+        con_busqueda = [r for r in lista if r["ramificacion"]]
+        agentes[nombre] = {
+            "jugadas": len(lista),
+            "nodos": nodos,
+            "cortes": sum(r["cortes"] for r in lista),
+            "evaluaciones": sum(r["evaluaciones"] for r in lista),
+            "segundos": round(segundos, 6),
+            "ms_por_jugada": round(segundos * 1000 / len(lista), 3),
+            "nodos_por_s": round(nodos / segundos) if segundos > 0 else 0,
+            "ramificacion": round(sum(r["ramificacion"] for r in con_busqueda) / len(con_busqueda), 3)
+            if con_busqueda else 0.0,
+            "profundidad_media": round(sum(r["profundidad"] for r in lista) / len(lista), 2),
+        }
+    return {"agentes": agentes}
+
+
+def leer_registros(archivo):
+    with open(archivo) as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
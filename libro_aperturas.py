@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bitboard import Tablero, COLUMNAS
+
+# Formato del libro: cabecera de 16 bytes (MAGIA, versión, jugadas cubiertas,
+# número de entradas) seguida de las entradas ordenadas por clave, cada una
+# con la clave canónica uint64 y la columna uint8 (9 bytes por posición).
+MAGIA = b'C4L1'
+VERSION = 1
+CABECERA = 16
+ENTRADA = np.dtype([('clave', '<u8'), ('columna', 'u1')])
+
+# Agentes ya construidos en cada proceso, por (jugador, profundidad)
+_agentes = {}
+# Libros ya cargados, por ruta
+_libros = {}
+
+
+class LibroAperturas:
+    """Jugadas precalculadas para las primeras jugadas de la partida.
+
+    Las posiciones se guardan por clave canónica, así que una posición y su
+    reflejo ocupan una sola entrada; buscar devuelve la columna ya reflejada
+    si hace falta. Posiciones con más fichas que las cubiertas por el libro
+    se descartan sin buscar.
+    """
+
+    def __init__(self, claves, columnas, jugadas):
+        self.claves = claves
+        self.columnas = columnas
+        self.jugadas = jugadas
+
+    def __len__(self):
+        return len(self.claves)
+
+    def buscar(self, tablero):
+        """Columna (0-6) del libro para el tablero, o None si no está."""
+        if tablero.num_fichas() > self.jugadas:
+            return None
+        clave, espejada = tablero.clave_canonica()
+        i = int(np.searchsorted(self.claves, clave))
+        if i == len(self.claves) or self.claves[i] != clave:
+            return None
+        columna = int(self.columnas[i])
+        return COLUMNAS - 1 - columna if espejada else columna
+
+    def buscar_lote(self, fichas, alturas):
+        """Versión vectorizada de buscar: columnas (0-6) de cada posición, -1 si no está."""
+        from td_vectorizado import claves_canonicas
+
+        claves, espejadas = claves_canonicas(fichas)
+        i = np.minimum(np.searchsorted(self.claves, claves), max(len(self.claves) - 1, 0))
+        columnas = np.full(len(claves), -1, dtype=np.int64)
+        if not len(self.claves):
+            return columnas
+        encontradas = (self.claves[i] == claves) & (alturas.sum(axis=1) <= self.jugadas)
+        columnas[encontradas] = self.columnas[i[encontradas]]
+        reflejar = encontradas & espejadas
+        columnas[reflejar] = COLUMNAS - 1 - columnas[reflejar]
+        return columnas
+
+    def guardar(self, ruta):
+        cabecera = np.zeros(CABECERA, dtype=np.uint8)
+        cabecera[:4] = np.frombuffer(MAGIA, dtype=np.uint8)
+        cabecera[4:16] = np.frombuffer(np.array([VERSION, self.jugadas, len(self)], dtype=np.uint32).tobytes(),
+                                       dtype=np.uint8)
+        entradas = np.zeros(len(self), dtype=ENTRADA)
+        entradas['clave'] = self.claves
+        entradas['columna'] = self.columnas
+        with open(ruta, 'wb') as f:
+            f.write(cabecera.tobytes())
+            f.write(entradas.tobytes())
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, 'rb') as f:
+            cabecera = f.read(CABECERA)
+        if cabecera[:4] != MAGIA:
+            raise ValueError(f"{ruta} no es un libro de aperturas")
+        version, jugadas, n = (int(x) for x in np.frombuffer(cabecera[4:16], dtype=np.uint32))
+        if version != VERSION:
+            raise ValueError(f"Versión de libro no soportada: {version}")
+        entradas = np.fromfile(ruta, dtype=ENTRADA, count=n, offset=CABECERA)
+        # Se copian a arreglos contiguos para que searchsorted no recorra la estructura
+        return cls(np.ascontiguousarray(entradas['clave']), np.ascontiguousarray(entradas['columna']), jugadas)
+
+
+def abrir_libro(libro):
+    """Acepta un LibroAperturas, una ruta o None; las rutas se cargan una vez por proceso."""
+    if libro is None or isinstance(libro, LibroAperturas):
+        return libro
+    if libro not in _libros:
+        _libros[libro] = LibroAperturas.cargar(libro)
+    return _libros[libro]
+
+
+def posiciones_libro(jugadas):
+    """Posiciones no terminadas con hasta jugadas fichas, una por clave canónica."""
+    nivel = {Tablero().clave(): Tablero()}
+    posiciones = list(nivel.values())
+    for _ in range(jugadas):
+        siguiente = {}
+        for tablero in nivel.values():
+            turno = tablero.num_fichas() % 2
+            for columna in tablero.movimientos_validos():
+                hijo = tablero.copiar()
+                hijo.jugar(columna, turno)
+                if not hijo.terminado() and not hijo.lleno():
+                    siguiente.setdefault(hijo.clave_canonica()[0], hijo)
+        nivel = siguiente
+        posiciones.extend(nivel.values())
+    return posiciones
+
+
+def _jugada(fichas, alturas, profundidad):
+    """Jugada de Minimax con alfa-beta para el jugador al que le toca mover."""
+    from agent import Agent
+
+    tablero = Tablero.desde_mascaras(list(fichas), list(alturas))
+    player_id = '1' if tablero.num_fichas() % 2 == 0 else '2'
+    if (player_id, profundidad) not in _agentes:
+        _agentes[player_id, profundidad] = Agent(profundidad, player_id, alpha_beta=True, transposicion=True)
+    return _agentes[player_id, profundidad].elegir_movimiento(tablero) - 1
+
+
+def construir_libro(jugadas=4, profundidad=8, workers=None):
+    """Busca la mejor jugada de cada posición de las primeras jugadas.
+
+    Con workers > 1 las posiciones se reparten entre procesos.
+    """
+    posiciones = posiciones_libro(jugadas)
+    print(f"Libro: {len(posiciones)} posiciones hasta {jugadas} jugadas, profundidad {profundidad}")
+    argumentos = ([tuple(t.fichas) for t in posiciones], [tuple(t.alturas) for t in posiciones],
+                  [profundidad] * len(posiciones))
+    inicio = time.perf_counter()
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            columnas = list(pool.map(_jugada, *argumentos, chunksize=16))
+    else:
+        columnas = list(map(_jugada, *argumentos))
+    print(f"Libro construido en {time.perf_counter() - inicio:.1f}s")
+
+    claves = []
+    for tablero, columna in zip(posiciones, columnas):
+        clave, espejada = tablero.clave_canonica()
+        claves.append((clave, COLUMNAS - 1 - columna if espejada else columna))
+    claves.sort()
+    return LibroAperturas(np.array([c for c, _ in claves], dtype=np.uint64),
+                          np.array([j for _, j in claves], dtype=np.uint8), jugadas)
+
+
+def main():
+    """Uso: python libro_aperturas.py [archivo] [jugadas] [profundidad] [workers]"""
+    archivo = sys.argv[1] if len(sys.argv) > 1 else "libro_aperturas.bin"
+    jugadas = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    profundidad = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else os.cpu_count()
+    libro = construir_libro(jugadas, profundidad, workers)
+    libro.guardar(archivo)
+    print(f"{len(libro)} posiciones guardadas en {archivo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import math
+import random
+import sys
+import time
+from array import array
+
+import paralelo
+from amenazas import casillas_ganadoras, MASCARAS_COLUMNA
+from bitboard import Tablero, ALTO, ABAJO, TABLERO_COMPLETO, COLUMNAS, alineado, indice_jugador
+
+SIN_HIJO = -1
+# Estado de un nodo según la jugada que lleva a él
+ABIERTO, VICTORIA, EMPATE = 0, 1, 2
+
+
+def simular(propias, rivales, generador, sesgo=True):
+    """Termina la partida con jugadas al azar; devuelve 1, 0 o -1 para el jugador en turno.
+
+    Con sesgo, cada jugador gana si puede y si no bloquea la casilla ganadora
+    del rival; el resto de las jugadas son al azar.
+    """
+    ocupadas = propias | rivales
+    signo = 1
+    while True:
+        posibles = (ocupadas + ABAJO) & TABLERO_COMPLETO
+        if not posibles:
+            return 0
+        if sesgo:
+            if casillas_ganadoras(propias, ocupadas) & posibles:
+                return signo
+            amenazas = casillas_ganadoras(rivales, ocupadas) & posibles
+            if amenazas:
+                jugada = amenazas & -amenazas
+            else:
+                jugada = posibles & generador.choice([m for m in MASCARAS_COLUMNA if posibles & m])
+            propias |= jugada
+        else:
+            jugada = posibles & generador.choice([m for m in MASCARAS_COLUMNA if posibles & m])
+            propias |= jugada
+            if alineado(propias):
+                return signo
+        ocupadas |= jugada
+        propias, rivales = rivales, propias
+        signo = -signo
+
+
+class Arbol:
+    """Árbol de búsqueda guardado en arreglos paralelos, un índice por nodo.
+
+    hijos tiene COLUMNAS entradas por nodo (SIN_HIJO si la jugada no se ha
+    expandido). victorias se cuenta desde el punto de vista del jugador que
+    hizo la jugada que lleva al nodo: 1 por victoria y 0.5 por empate.
+    """
+
+    def __init__(self):
+        self.hijos = array('i')
+        self.visitas = array('i')
+        self.victorias = array('d')
+        self.estado = array('b')
+
+    def __len__(self):
+        return len(self.visitas)
+
+    def nuevo(self, estado=ABIERTO):
+        self.hijos.extend([SIN_HIJO] * COLUMNAS)
+        self.visitas.append(0)
+        self.victorias.append(0.0)
+        self.estado.append(estado)
+        return len(self.visitas) - 1
+
+    def subarbol(self, raiz):
+        """Copia compacta del subárbol de raiz; la raíz queda en el índice 0."""
+        arbol = Arbol()
+        arbol.nuevo(self.estado[raiz])
+        pendientes = [(raiz, 0)]
+        while pendientes:
+            viejo, nuevo = pendientes.pop()
+            arbol.visitas[nuevo] = self.visitas[viejo]
+            arbol.victorias[nuevo] = self.victorias[viejo]
+            for col in range(COLUMNAS):
+                hijo = self.hijos[viejo * COLUMNAS + col]
+                if hijo != SIN_HIJO:
+                    copia = arbol.nuevo(self.estado[hijo])
+                    arbol.hijos[nuevo * COLUMNAS + col] = copia
+                    pendientes.append((hijo, copia))
+        return arbol
+
+
+class MCTSAgent:
+    """Agente de búsqueda de Monte Carlo con UCT.
+
+    Cada iteración baja por el árbol eligiendo el hijo con mayor UCT, expande
+    una jugada nueva, termina la partida con simular y propaga el resultado.
+    Se detiene tras iteraciones simulaciones o, con tiempo_ms, al acabarse el
+    tiempo (iteraciones pasa a ser el máximo; None = sin límite). La jugada
+    elegida es la columna con más visitas.
+
+    Con reutilizar, el subárbol de la posición después de la jugada propia y
+    la del rival se conserva para la siguiente jugada. Con workers > 1 cada
+    proceso hace su propia búsqueda desde la raíz y se suman las visitas por
+    columna (paralelismo de raíz); en ese modo el árbol no se reutiliza.
+    """
+
+    def __init__(self, player_id, iteraciones=2000, tiempo_ms=None, exploracion=1.4, sesgo=True,
+                 reutilizar=True, max_nodos=500000, workers=1, semilla=None):
+        self.id = str(player_id)
+        self.indice = indice_jugador(self.id)
+        self.iteraciones = iteraciones
+        self.tiempo_ms = tiempo_ms
+        self.exploracion = exploracion
+        self.sesgo = sesgo
+        self.reutilizar = reutilizar
+        self.max_nodos = max_nodos
+        self.workers = workers
+        self.semilla = semilla
+        self.generador = random.Random(semilla)
+        self.nodos = 0
+        self.profundidad_alcanzada = 0
+        self.nueva_partida()
+
+    def nueva_partida(self):
+        """Descarta el árbol guardado."""
+        self.arbol = None
+        self.raiz = 0
+        self.fichas_raiz = None
+
+    def _raiz_para(self, fichas):
+        """Nodo del árbol guardado que corresponde a la posición, o None."""
+        if self.arbol is None:
+            return None
+        anteriores = self.fichas_raiz
+        if any(anteriores[j] & ~fichas[j] for j in (0, 1)):
+            return None
+        propias = fichas[self.indice] ^ anteriores[self.indice]
+        rivales = fichas[1 - self.indice] ^ anteriores[1 - self.indice]
+        if not propias and not rivales:
+            return self.raiz
+        # Solo se reconoce la jugada propia seguida de la respuesta del rival
+        if propias & (propias - 1) or rivales & (rivales - 1) or not propias or not rivales:
+            return None
+        nodo = self.raiz
+        for bit in (propias, rivales):
+            nodo = self.arbol.hijos[nodo * COLUMNAS + (bit.bit_length() - 1) // ALTO]
+            if nodo == SIN_HIJO:
+                return None
+        return nodo
+
+    def preparar(self, fichas):
+        """Deja en self.arbol y self.raiz el árbol para la posición, reutilizándolo si se puede."""
+        raiz = self._raiz_para(fichas) if self.reutilizar else None
+        if raiz is None:
+            self.arbol = Arbol()
+            self.raiz = self.arbol.nuevo()
+        elif raiz != self.raiz or len(self.arbol) >= self.max_nodos:
+            self.arbol = self.arbol.subarbol(raiz)
+            self.raiz = 0
+            if len(self.arbol) >= self.max_nodos:
+                self.arbol = Arbol()
+                self.raiz = self.arbol.nuevo()
+        self.fichas_raiz = tuple(fichas)
+
+    def iterar(self, propias, rivales):
+        """Una simulación desde la raíz; devuelve la profundidad a la que se expandió."""
+        arbol = self.arbol
+        hijos, visitas, victorias, estado = arbol.hijos, arbol.visitas, arbol.victorias, arbol.estado
+        nodo = self.raiz
+        camino = [nodo]
+        ocupadas = propias | rivales
+
+        while estado[nodo] == ABIERTO:
+            posibles = (ocupadas + ABAJO) & TABLERO_COMPLETO
+            base = nodo * COLUMNAS
+            nuevas = [col for col in range(COLUMNAS)
+                      if posibles & MASCARAS_COLUMNA[col] and hijos[base + col] == SIN_HIJO]
+            if nuevas and len(arbol) < self.max_nodos:
+                col = self.generador.choice(nuevas)
+                jugada = posibles & MASCARAS_COLUMNA[col]
+                propias |= jugada
+                ocupadas |= jugada
+                if alineado(propias):
+                    nuevo_estado = VICTORIA
+                elif ocupadas == TABLERO_COMPLETO:
+                    nuevo_estado = EMPATE
+                else:
+                    nuevo_estado = ABIERTO
+                nodo = arbol.nuevo(nuevo_estado)
+                hijos[base + col] = nodo
+                camino.append(nodo)
+                propias, rivales = rivales, propias
+                break
+            if nuevas:
+                # Sin espacio para más nodos: se simula desde aquí
+                break
+
+            # Todas las jugadas expandidas: UCT
+            logaritmo = self.exploracion * math.sqrt(math.log(visitas[nodo]))
+            mejor, mejor_col = -1.0, None
+            for col in range(COLUMNAS):
+                hijo = hijos[base + col]
+                if hijo != SIN_HIJO:
+                    n = visitas[hijo]
+                    uct = victorias[hijo] / n + logaritmo / math.sqrt(n)
+                    if uct > mejor:
+                        mejor, mejor_col = uct, col
+            jugada = posibles & MASCARAS_COLUMNA[mejor_col]
+            propias |= jugada
+            ocupadas |= jugada
+            propias, rivales = rivales, propias
+            nodo = hijos[base + mejor_col]
+            camino.append(nodo)
+
+        # Resultado para quien hizo la jugada que lleva al nodo final
+        if estado[nodo] == VICTORIA:
+            puntos = 1.0
+        elif estado[nodo] == EMPATE:
+            puntos = 0.5
+        else:
+            puntos = (1 - simular(propias, rivales, self.generador, self.sesgo)) / 2
+        for nodo in reversed(camino):
+            visitas[nodo] += 1
+            victorias[nodo] += puntos
+            puntos = 1.0 - puntos
+        return len(camino) - 1
+
+    def buscar(self, fichas):
+        """Busca desde la posición; devuelve las visitas y victorias de cada columna de la raíz."""
+        self.preparar(fichas)
+        propias, rivales = fichas[self.indice], fichas[1 - self.indice]
+        limite = time.perf_counter() + self.tiempo_ms / 1000 if self.tiempo_ms is not None else None
+        maximo = self.iteraciones if self.iteraciones is not None else math.inf
+        self.nodos = 0
+        self.profundidad_alcanzada = 0
+        while self.nodos < maximo:
+            # El reloj se consulta cada 64 iteraciones
+            if limite is not None and self.nodos % 64 == 0 and self.nodos and time.perf_counter() > limite:
+                break
+            profundidad = self.iterar(propias, rivales)
+            self.nodos += 1
+            if profundidad > self.profundidad_alcanzada:
+                self.profundidad_alcanzada = profundidad
+        return self.estadisticas_raiz()
+
+    def estadisticas_raiz(self):
+        base = self.raiz * COLUMNAS
+        resultado = []
+        for col in range(COLUMNAS):
+            hijo = self.arbol.hijos[base + col]
+            if hijo == SIN_HIJO:
+                resultado.append((0, 0.0))
+            else:
+                resultado.append((self.arbol.visitas[hijo], self.arbol.victorias[hijo]))
+        return resultado
+
+    def elegir_movimiento(self, tablero):
+        """Acepta tanto un Tablero como el formato de get_estado_tablero."""
+        if not isinstance(tablero, Tablero):
+            tablero = Tablero.desde_lista(tablero)
+        movimientos = tablero.movimientos_validos()
+        if not movimientos:
+            return None
+        fichas = tuple(tablero.fichas)
+        if self.workers > 1:
+            estadisticas = buscar_paralelo(self, fichas, self.workers)
+        else:
+            estadisticas = self.buscar(fichas)
+        # Más visitas; a igualdad, mejor tasa de victorias
+        columna = max(movimientos, key=lambda col: (estadisticas[col][0],
+                                                    estadisticas[col][1] / max(estadisticas[col][0], 1)))
+        return columna + 1  # Ajustar a la numeración del connect4.py
+
+
+def _buscar_trabajador(player_id, fichas, iteraciones, tiempo_ms, exploracion, sesgo, max_nodos, semilla):
+    agente = MCTSAgent(player_id, iteraciones=iteraciones, tiempo_ms=tiempo_ms, exploracion=exploracion,
+                       sesgo=sesgo, reutilizar=False, max_nodos=max_nodos, semilla=semilla)
+    estadisticas = agente.buscar(fichas)
+    return estadisticas, agente.nodos, agente.profundidad_alcanzada
+
+
+def buscar_paralelo(agente, fichas, workers):
+    """Paralelismo de raíz: búsquedas independientes en el pool de paralelo y suma por columna."""
+    iteraciones = None if agente.iteraciones is None else math.ceil(agente.iteraciones / workers)
+    pool = paralelo.obtener_pool(workers)
+    futuros = [
+        pool.submit(_buscar_trabajador, agente.id, fichas, iteraciones, agente.tiempo_ms, agente.exploracion,
+                    agente.sesgo, agente.max_nodos, agente.generador.getrandbits(32))
+        for _ in range(workers)
+    ]
+    totales = [[0, 0.0] for _ in range(COLUMNAS)]
+    agente.nodos = 0
+    agente.profundidad_alcanzada = 0
+    for futuro in futuros:
+        estadisticas, nodos, profundidad = futuro.result()
+        agente.nodos += nodos
+        agente.profundidad_alcanzada = max(agente.profundidad_alcanzada, profundidad)
+        for col, (visitas, victorias) in enumerate(estadisticas):
+            totales[col][0] += visitas
+            totales[col][1] += victorias
+    return [tuple(total) for total in totales]
+
+
+def main():
+    """Uso: python mcts.py 4453 [iteraciones] [workers] (columnas 1-7 jugadas desde el tablero vacío)"""
+    secuencia = sys.argv[1] if len(sys.argv) > 1 else ""
+    iteraciones = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    tablero = Tablero()
+    for i, caracter in enumerate(secuencia):
+        tablero.jugar(int(caracter) - 1, i % 2)
+    agente = MCTSAgent('1' if len(secuencia) % 2 == 0 else '2', iteraciones=iteraciones, workers=workers)
+    inicio = time.perf_counter()
+    columna = agente.elegir_movimiento(tablero)
+    segundos = time.perf_counter() - inicio
+    print(f"Mejor columna: {columna}, {agente.nodos} simulaciones en {segundos:.2f}s "
+          f"({agente.nodos / segundos:,.0f}/s), profundidad {agente.profundidad_alcanzada}")
+
+
+if __name__ == "__main__":
+    main()
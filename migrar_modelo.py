@@ -0,0 +1,18 @@
+import pickle
+import sys
+from td_agent import migrar_q_values
+
+def main():
+    """Convierte un modelo guardado con claves de tuplas al formato de claves canónicas."""
+    entrada = sys.argv[1] if len(sys.argv) > 1 else "td_model.pkl"
+    salida = sys.argv[2] if len(sys.argv) > 2 else entrada
+
+    with open(entrada, 'rb') as f:
+        q_values = pickle.load(f)
+    migrados = migrar_q_values(q_values)
+    with open(salida, 'wb') as f:
+        pickle.dump(migrados, f)
+    print(f"{len(q_values)} estados migrados a {len(migrados)} claves canónicas en {salida}")
+
+if __name__ == "__main__":
+    main()
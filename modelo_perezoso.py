@@ -0,0 +1,189 @@
+import os
+import shutil
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from tabla_q import TablaQ, ACCIONES, VACIA
+
+# Formato ordenado: cabecera de 32 bytes (MAGIA, versión, número de estados,
+# paso del índice) seguida del índice disperso int64[ceil(n / paso)] con una
+# de cada paso claves, las claves int64[n] ordenadas y los valores
+# float32[n, 7], todo en el orden nativo de la máquina.
+MAGIA = b'C4S1'
+VERSION = 1
+CABECERA = 32
+PASO = 256
+CAPACIDAD = 100000
+_CEROS = np.zeros(ACCIONES, dtype=np.float32)
+_CEROS.flags.writeable = False
+
+
+def es_archivo_ordenado(ruta):
+    """Indica si el archivo tiene el formato ordenado de ModeloPerezoso."""
+    with open(ruta, 'rb') as f:
+        return f.read(len(MAGIA)) == MAGIA
+
+
+def escribir(tabla, ruta, paso=PASO):
+    """Guarda una TablaQ (o un dict clave -> valores) en el formato ordenado."""
+    if not isinstance(tabla, TablaQ):
+        tabla = TablaQ.desde_dict(tabla)
+    ocupadas = tabla.claves != VACIA
+    orden = np.argsort(tabla.claves[ocupadas], kind='stable')
+    claves = tabla.claves[ocupadas][orden]
+    valores = tabla.valores[ocupadas][orden]
+
+    cabecera = np.zeros(CABECERA, dtype=np.uint8)
+    cabecera[:4] = np.frombuffer(MAGIA, dtype=np.uint8)
+    cabecera[4:8] = np.frombuffer(np.uint32(VERSION).tobytes(), dtype=np.uint8)
+    cabecera[8:24] = np.frombuffer(np.array([len(claves), paso], dtype=np.uint64).tobytes(), dtype=np.uint8)
+    with open(ruta, 'wb') as f:
+        f.write(cabecera.tobytes())
+        f.write(np.ascontiguousarray(claves[::paso]).tobytes())
+        f.write(np.ascontiguousarray(claves).tobytes())
+        f.write(np.ascontiguousarray(valores, dtype=np.float32).tobytes())
+
+
+class ModeloPerezoso:
+    """Tabla Q de solo lectura que lee los estados del disco a medida que se piden.
+
+    Al abrir el archivo solo se lee el índice disperso (una clave de cada
+    paso), así que abrir es inmediato y la memoria no depende del tamaño del
+    modelo. Para buscar un estado se ubica su bloque en el índice, se lee ese
+    bloque de claves y, si está, su fila de valores. Los estados consultados
+    (también los que no están, que valen 0 como en TablaQ) se guardan en una
+    caché LRU de hasta capacidad entradas; aciertos y fallos se cuentan para
+    tasa_aciertos.
+
+    Se usa como TablaQ en TDAgent para jugar; las filas devueltas no se
+    pueden modificar, así que no sirve para entrenar.
+    """
+
+    def __init__(self, ruta, capacidad=CAPACIDAD):
+        self.archivo = None
+        self.ruta = ruta
+        self.capacidad = capacidad
+        self.cache = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.solo_lectura = True
+        with open(ruta, 'rb') as f:
+            cabecera = f.read(CABECERA)
+        if cabecera[:4] != MAGIA:
+            raise ValueError(f"{ruta} no es un modelo ordenado")
+        version = int(np.frombuffer(cabecera[4:8], dtype=np.uint32)[0])
+        if version != VERSION:
+            raise ValueError(f"Versión de modelo ordenado no soportada: {version}")
+        self.n, self.paso = (int(x) for x in np.frombuffer(cabecera[8:24], dtype=np.uint64))
+        bloques = -(-self.n // self.paso)
+        self.indice = np.fromfile(ruta, dtype=np.int64, count=bloques, offset=CABECERA)
+        self.inicio_claves = CABECERA + 8 * bloques
+        self.inicio_valores = self.inicio_claves + 8 * self.n
+        self.archivo = os.open(ruta, os.O_RDONLY)
+
+    def cerrar(self):
+        if self.archivo is not None:
+            os.close(self.archivo)
+            self.archivo = None
+
+    def __del__(self):
+        self.cerrar()
+
+    def _leer(self, clave):
+        """Fila de valores de la clave leída del disco, o None si no está."""
+        bloque = int(np.searchsorted(self.indice, clave, side='right')) - 1
+        if bloque < 0:
+            return None
+        primera = bloque * self.paso
+        cantidad = min(self.paso, self.n - primera)
+        claves = np.frombuffer(os.pread(self.archivo, 8 * cantidad, self.inicio_claves + 8 * primera),
+                               dtype=np.int64)
+        j = int(np.searchsorted(claves, clave))
+        if j == cantidad or claves[j] != clave:
+            return None
+        fila = os.pread(self.archivo, 4 * ACCIONES, self.inicio_valores + 4 * ACCIONES * (primera + j))
+        return np.frombuffer(fila, dtype=np.float32)
+
+    def _buscar(self, clave):
+        if clave in self.cache:
+            self.aciertos += 1
+            self.cache.move_to_end(clave)
+            return self.cache[clave]
+        self.fallos += 1
+        valores = self._leer(clave)
+        self.cache[clave] = valores
+        if len(self.cache) > self.capacidad:
+            self.cache.popitem(last=False)
+        return valores
+
+    def __getitem__(self, clave):
+        valores = self._buscar(clave)
+        return _CEROS if valores is None else valores
+
+    def get(self, clave, defecto=None):
+        valores = self._buscar(clave)
+        return defecto if valores is None else valores
+
+    def __contains__(self, clave):
+        return self._buscar(clave) is not None
+
+    def __len__(self):
+        return self.n
+
+    def valores_lote(self, claves):
+        """Valores (N, 7) de un arreglo de claves, pasando por la caché."""
+        return np.array([self[clave] for clave in np.asarray(claves).tolist()], dtype=np.float64)
+
+    def items(self, bloque=1 << 16):
+        """Recorre todo el archivo en bloques, sin pasar por la caché."""
+        for primera in range(0, self.n, bloque):
+            cantidad = min(bloque, self.n - primera)
+            claves = np.fromfile(self.ruta, dtype=np.int64, count=cantidad,
+                                 offset=self.inicio_claves + 8 * primera)
+            valores = np.fromfile(self.ruta, dtype=np.float32, count=cantidad * ACCIONES,
+                                  offset=self.inicio_valores + 4 * ACCIONES * primera).reshape(cantidad, ACCIONES)
+            yield from zip(claves.tolist(), valores)
+
+    def keys(self):
+        return (clave for clave, _ in self.items())
+
+    def guardar(self, ruta):
+        """Copia el archivo (el modelo ya está en el formato ordenado)."""
+        if os.path.abspath(ruta) != os.path.abspath(self.ruta):
+            shutil.copyfile(self.ruta, ruta)
+
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def estadisticas(self):
+        return {
+            "estados": self.n,
+            "en_cache": len(self.cache),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.tasa_aciertos(),
+        }
+
+
+def main():
+    """Uso: python modelo_perezoso.py td_model.pkl td_model.c4s [paso]"""
+    from td_agent import TDAgent
+
+    origen, destino = sys.argv[1], sys.argv[2]
+    paso = int(sys.argv[3]) if len(sys.argv) > 3 else PASO
+    agente = TDAgent(player_id=1)
+    agente.cargar_modelo(origen)
+    escribir(agente.q_values, destino, paso)
+
+    inicio = time.perf_counter()
+    modelo = ModeloPerezoso(destino)
+    print(f"{modelo.n} estados escritos en {destino}; "
+          f"abierto en {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+from bitboard import COLUMNAS
+from evaluacion import TableroEvaluado
+
+# Tipos de evento que reciben los suscriptores del motor
+JUGADA = "jugada"
+DESHACER = "deshacer"
+REINICIO = "reinicio"
+
+
+class Motor:
+    """Estado de una partida sin interfaz gráfica: legalidad, victoria y deshacer.
+
+    Las columnas van de 1 a 7 como en connect4.py. La posición vive en un
+    TableroEvaluado que los agentes pueden recibir directamente (Agent busca
+    sobre él colocando y retirando fichas, sin copiarlo). Las vistas se
+    suscriben con una función oyente(evento, columna, fila, jugador), con la
+    fila contada desde abajo (1-6) y jugador 0 o 1.
+    """
+
+    def __init__(self):
+        self.tablero = TableroEvaluado()
+        self.turno = 0
+        self.ganador = None
+        self.oyentes = []
+
+    def suscribir(self, oyente):
+        self.oyentes.append(oyente)
+
+    def _avisar(self, evento, columna=None, fila=None, jugador=None):
+        for oyente in self.oyentes:
+            oyente(evento, columna, fila, jugador)
+
+    def es_valida(self, columna):
+        return (self.ganador is None and isinstance(columna, int)
+                and 1 <= columna <= COLUMNAS and self.tablero.puede_jugar(columna - 1))
+
+    def jugar(self, columna):
+        """Coloca una ficha del jugador en turno; devuelve False si la jugada no es válida."""
+        if not self.es_valida(columna):
+            return False
+        jugador = self.turno
+        self.tablero.jugar(columna - 1, jugador)
+        fila = self.tablero.alturas[columna - 1]
+        if self.tablero.gana(jugador):
+            self.ganador = jugador
+        else:
+            self.turno = 1 - jugador
+        self._avisar(JUGADA, columna, fila, jugador)
+        return True
+
+    def deshacer(self):
+        """Retira la última ficha; devuelve su columna (1-7) o None si no hay jugadas."""
+        if not self.tablero.historial:
+            return None
+        fila = self.tablero.alturas[self.tablero.historial[-1][0]]
+        columna, jugador = self.tablero.deshacer()
+        self.turno = jugador
+        self.ganador = None
+        self._avisar(DESHACER, columna + 1, fila, jugador)
+        return columna + 1
+
+    def reiniciar(self):
+        self.tablero = TableroEvaluado()
+        self.turno = 0
+        self.ganador = None
+        self._avisar(REINICIO)
+
+    def lleno(self):
+        return self.tablero.lleno()
+
+    def terminado(self):
+        return self.ganador is not None or self.lleno()
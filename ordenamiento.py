@@ -0,0 +1,73 @@
+from bitboard import COLUMNAS
+
+# Orden estático: primero el centro, luego hacia los bordes
+ORDEN_CENTRO = [3, 2, 4, 1, 5, 0, 6]
+
+ESTRATEGIAS = ('heuristica', 'centro', 'tt', 'killer', 'historia')
+
+
+class OrdenMovimientos:
+    """Ordenamiento de jugadas configurable para Agent.minimax.
+
+    Las estrategias se combinan con '+', por ejemplo "tt+killer+historia":
+      - heuristica: evalúa cada hijo con la heurística (comportamiento original)
+      - centro: orden estático centro primero (se usa si no hay heuristica)
+      - historia: columnas que produjeron cortes antes, ponderadas por profundidad
+      - killer: hasta dos jugadas que produjeron corte en el mismo ply
+      - tt: la mejor jugada guardada en la tabla de transposición va primero
+    """
+
+    def __init__(self, estrategias="heuristica+tt"):
+        if isinstance(estrategias, str):
+            estrategias = estrategias.split('+')
+        estrategias = set(estrategias)
+        desconocidas = estrategias - set(ESTRATEGIAS)
+        if desconocidas:
+            raise ValueError(f"Estrategias de ordenamiento desconocidas: {sorted(desconocidas)}")
+        self.estrategias = estrategias
+        self.heuristica = 'heuristica' in estrategias
+        self.usar_tt = 'tt' in estrategias
+        self.usar_killer = 'killer' in estrategias
+        self.usar_historia = 'historia' in estrategias
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.killers = {}
+        self.historia = [[0] * COLUMNAS for _ in range(2)]
+
+    def ordenar(self, agente, tablero, movimientos, mejor=None, jugador=0):
+        if self.heuristica:
+            def valor(col):
+                tablero.jugar(col, agente.indice)
+                resultado = agente.evaluar(tablero)
+                tablero.deshacer()
+                return resultado
+            orden = sorted(movimientos, key=valor, reverse=True)
+        else:
+            orden = [col for col in ORDEN_CENTRO if col in movimientos]
+
+        if self.usar_historia:
+            historia = self.historia[jugador]
+            orden.sort(key=lambda col: historia[col], reverse=True)
+
+        if self.usar_killer:
+            for killer in reversed(self.killers.get(tablero.num_fichas(), ())):
+                if killer in orden:
+                    orden.remove(killer)
+                    orden.insert(0, killer)
+
+        if self.usar_tt and mejor is not None and mejor in orden:
+            orden.remove(mejor)
+            orden.insert(0, mejor)
+        return orden
+
+    def registrar_corte(self, tablero, columna, jugador, profundidad):
+        """Guarda la jugada que produjo un corte alfa-beta."""
+        if self.usar_killer:
+            ply = tablero.num_fichas()
+            killers = self.killers.setdefault(ply, [])
+            if columna not in killers:
+                killers.insert(0, columna)
+                del killers[2:]
+        if self.usar_historia:
+            self.historia[jugador][columna] += profundidad * profundidad
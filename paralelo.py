@@ -0,0 +1,176 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluacion import TableroEvaluado
+
+# Pools compartidos por número de procesos; el Agent no guarda el pool para
+# seguir siendo serializable con pickle
+_pools = {}
+
+# Agentes ya construidos dentro de cada proceso trabajador
+_agentes = {}
+
+
+def obtener_pool(workers):
+    if workers not in _pools:
+        _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _pools[workers]
+
+
+def cerrar_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def configuracion(agente):
+    """Parámetros para reconstruir el agente en otro proceso."""
+    return (
+        agente.id,
+        agente.alpha_beta,
+        '+'.join(sorted(agente.orden.estrategias)),
+        agente.tabla.tamano if agente.tabla is not None else None,
+    )
+
+
+def _agente_trabajador(config):
+    from agent import Agent
+
+    if config not in _agentes:
+        player_id, alpha_beta, ordenamiento, tamano_tabla = config
+        _agentes[config] = Agent(depth=1, player_id=player_id, alpha_beta=alpha_beta,
+                                 transposicion=tamano_tabla, ordenamiento=ordenamiento)
+    return _agentes[config]
+
+
+def _evaluar_hijo(config, fichas, alturas, columna, profundidad, alpha):
+    """Valor minimax del hijo que resulta de jugar la columna (turno del oponente)."""
+    agente = _agente_trabajador(config)
+    agente.nodos = 0
+    if agente.tabla is not None:
+        agente.tabla.nueva_busqueda()
+    tablero = TableroEvaluado.desde_mascaras(fichas, alturas)
+    tablero.jugar(columna, agente.indice)
+    valor, _ = agente.minimax(tablero, profundidad, alpha, math.inf, False)
+    return valor, agente.nodos
+
+
+def buscar_raiz(agente, tablero, profundidad, workers):
+    """Reparte los hijos de la raíz entre procesos.
+
+    El primer hijo se busca en este proceso con ventana completa (Young
+    Brothers Wait en la raíz) y su valor se usa como alfa para el resto, que
+    se buscan en paralelo. Como en la búsqueda secuencial, se elige el primer
+    hijo en el orden con el valor máximo, así que la jugada coincide con la de
+    alfa-beta secuencial a la misma profundidad.
+    """
+    movimientos = tablero.movimientos_validos()
+    if profundidad == 0 or tablero.terminado() or len(movimientos) < 2:
+        return agente.minimax(tablero, profundidad, -math.inf, math.inf, True)
+
+    agente.nodos = 1
+    movimientos = agente.ordenar_movimientos(tablero, movimientos, None, agente.indice)
+    primero = movimientos[0]
+    tablero.jugar(primero, agente.indice)
+    mejor_eval, _ = agente.minimax(tablero, profundidad - 1, -math.inf, math.inf, False)
+    tablero.deshacer()
+    mejor_columna = primero
+
+    alpha = mejor_eval if agente.alpha_beta else -math.inf
+    config = configuracion(agente)
+    pool = obtener_pool(workers)
+    futuros = [
+        pool.submit(_evaluar_hijo, config, tuple(tablero.fichas), tuple(tablero.alturas),
+                    columna, profundidad - 1, alpha)
+        for columna in movimientos[1:]
+    ]
+    for columna, futuro in zip(movimientos[1:], futuros):
+        evaluacion, nodos = futuro.result()
+        agente.nodos += nodos
+        if evaluacion > mejor_eval:
+            mejor_eval = evaluacion
+            mejor_columna = columna
+    return mejor_eval, mejor_columna
+
+
+def configuracion_lote(agente):
+    """configuracion más los parámetros de elegir_movimiento que no son de minimax."""
+    return configuracion(agente) + (agente.depth, agente.tiempo_ms, agente.resolver_desde)
+
+
+def _elegir_posiciones(agente, fichas, alturas):
+    movimientos, valores = [], []
+    for mascaras, columnas in zip(fichas, alturas):
+        movimientos.append(agente.elegir_movimiento(TableroEvaluado.desde_mascaras(mascaras, columnas)))
+        valores.append(math.nan if agente.valor_raiz is None else agente.valor_raiz)
+    return movimientos, valores
+
+
+def _elegir_bloque(config, fichas, alturas):
+    """Jugadas y valores de un bloque de posiciones con un agente de este proceso."""
+    from agent import Agent
+
+    if config not in _agentes:
+        player_id, alpha_beta, ordenamiento, tamano_tabla, depth, tiempo_ms, resolver_desde = config
+        _agentes[config] = Agent(depth=depth, player_id=player_id, alpha_beta=alpha_beta,
+                                 transposicion=tamano_tabla, tiempo_ms=tiempo_ms,
+                                 ordenamiento=ordenamiento, resolver_desde=resolver_desde)
+    return _elegir_posiciones(_agentes[config], fichas, alturas)
+
+
+def elegir_lote(agente, fichas, alturas, workers=None, bloque=64):
+    """Reparte posiciones (listas de máscaras y alturas) en bloques entre procesos.
+
+    Cada proceso reutiliza su agente (y su tabla de transposición) para
+    todas las posiciones de sus bloques. Con workers=1 todo se busca en este
+    proceso con el mismo agente.
+    """
+    workers = workers or os.cpu_count()
+    if workers == 1 or len(fichas) <= bloque:
+        return _elegir_posiciones(agente, fichas, alturas)
+
+    config = configuracion_lote(agente)
+    pool = obtener_pool(workers)
+    futuros = [pool.submit(_elegir_bloque, config, fichas[i:i + bloque], alturas[i:i + bloque])
+               for i in range(0, len(fichas), bloque)]
+    movimientos, valores = [], []
+    for futuro in futuros:
+        columnas, puntajes = futuro.result()
+        movimientos.extend(columnas)
+        valores.extend(puntajes)
+    return movimientos, valores
+
+
+def medir_aceleracion(posiciones, profundidades=range(6, 11), workers=None, alpha_beta=True):
+    """Mide el tiempo de la búsqueda secuencial y paralela sobre las mismas posiciones.
+
+    posiciones es una lista de (tablero, player_id). Devuelve una lista de
+    diccionarios con los tiempos, la aceleración y si las jugadas coinciden.
+    """
+    from agent import Agent
+
+    workers = workers or os.cpu_count()
+    resultados = []
+    for profundidad in profundidades:
+        tiempos = {}
+        jugadas = {}
+        for n in (1, workers):
+            inicio = time.perf_counter()
+            jugadas[n] = [
+                Agent(profundidad, player_id, alpha_beta=alpha_beta, workers=n).elegir_movimiento(tablero)
+                for tablero, player_id in posiciones
+            ]
+            tiempos[n] = time.perf_counter() - inicio
+        resultados.append({
+            "profundidad": profundidad,
+            "workers": workers,
+            "secuencial_s": tiempos[1],
+            "paralelo_s": tiempos[workers],
+            "aceleracion": tiempos[1] / tiempos[workers] if tiempos[workers] else 0.0,
+            "misma_jugada": jugadas[1] == jugadas[workers],
+        })
+        print(f"Profundidad {profundidad}: {tiempos[1]:.2f}s secuencial, "
+              f"{tiempos[workers]:.2f}s con {workers} procesos")
+    return resultados
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class BufferRepeticion:
+    """Memoria de transiciones de tamaño fijo sobre arreglos circulares de NumPy.
+
+    Cada transición es (clave, acción, recompensa, clave_nueva, terminal),
+    con las claves enteras de TDAgent.clave_canonica; cuando la memoria se
+    llena, las nuevas reemplazan a las más antiguas. Con priorizado=True las
+    transiciones se muestrean en proporción a su último error de TD elevado a
+    alfa, y las recién agregadas reciben la prioridad más alta vista.
+    """
+
+    def __init__(self, capacidad=100000, priorizado=False, alfa=0.6, semilla=None):
+        self.capacidad = capacidad
+        self.priorizado = priorizado
+        self.alfa = alfa
+        self.claves = np.zeros(capacidad, dtype=np.int64)
+        self.acciones = np.zeros(capacidad, dtype=np.int8)
+        self.recompensas = np.zeros(capacidad, dtype=np.float32)
+        self.claves_nuevas = np.zeros(capacidad, dtype=np.int64)
+        self.terminales = np.zeros(capacidad, dtype=bool)
+        self.prioridades = np.zeros(capacidad)
+        self.prioridad_maxima = 1.0
+        self.siguiente = 0
+        self.n = 0
+        self.rng = np.random.default_rng(semilla)
+
+    def __len__(self):
+        return self.n
+
+    def agregar(self, clave, accion, recompensa, clave_nueva, terminal):
+        """Guarda una transición y devuelve su índice."""
+        i = self.siguiente
+        self.claves[i] = clave
+        self.acciones[i] = accion
+        self.recompensas[i] = recompensa
+        self.claves_nuevas[i] = clave_nueva
+        self.terminales[i] = terminal
+        self.prioridades[i] = self.prioridad_maxima
+        self.siguiente = (i + 1) % self.capacidad
+        self.n = min(self.n + 1, self.capacidad)
+        return i
+
+    def muestrear(self, tamano):
+        """Índices de tamano transiciones tomadas al azar (con reemplazo)."""
+        if self.n == 0 or tamano <= 0:
+            return np.zeros(0, dtype=np.int64)
+        if not self.priorizado:
+            return self.rng.integers(0, self.n, size=tamano)
+        prioridades = self.prioridades[:self.n]
+        return self.rng.choice(self.n, size=tamano, p=prioridades / prioridades.sum())
+
+    def transiciones(self, indices):
+        """Arreglos (claves, acciones, recompensas, claves_nuevas, terminales) de los índices."""
+        return (self.claves[indices], self.acciones[indices].astype(np.int64),
+                self.recompensas[indices].astype(float), self.claves_nuevas[indices],
+                self.terminales[indices])
+
+    def actualizar_prioridades(self, indices, errores):
+        """Actualiza la prioridad de las transiciones con su nuevo error de TD."""
+        if not self.priorizado or len(indices) == 0:
+            return
+        prioridades = (np.abs(errores) + 1e-6) ** self.alfa
+        self.prioridades[indices] = prioridades
+        self.prioridad_maxima = max(self.prioridad_maxima, float(prioridades.max()))
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import Tablero, FILAS, COLUMNAS
+from torneo import crear_agente
+
+DIRECCION = "127.0.0.1:8765"
+# Segundos de margen sobre el presupuesto de la petición antes de responder con error
+MARGEN_S = 2.0
+# Presupuesto máximo de una jugada; también se usa cuando la petición no trae tiempo_ms
+LIMITE_S = 60.0
+
+# Agentes ya construidos en cada proceso trabajador, por (especificación, player_id)
+_agentes = {}
+
+
+def _agente(especificacion, player_id):
+    clave = (especificacion, player_id)
+    if clave not in _agentes:
+        _agentes[clave] = crear_agente(json.loads(especificacion), player_id)
+    return _agentes[clave]
+
+
+def _iniciar_trabajador(especificaciones):
+    """Construye de antemano los agentes (y carga sus modelos) en cada proceso."""
+    for especificacion in especificaciones:
+        for player_id in (1, 2):
+            _agente(especificacion, player_id)
+
+
+def _preparado():
+    return os.getpid()
+
+
+def leer_tablero(peticion):
+    """Tablero de la petición: "tablero" como get_estado_tablero o "jugadas" como "4453"."""
+    if "jugadas" in peticion:
+        tablero = Tablero()
+        for i, caracter in enumerate(str(peticion["jugadas"])):
+            columna = int(caracter) - 1
+            if not 0 <= columna < COLUMNAS or not tablero.puede_jugar(columna):
+                raise ValueError(f"Jugada inválida: {caracter}")
+            tablero.jugar(columna, i % 2)
+        return tablero
+    filas = peticion.get("tablero")
+    if not isinstance(filas, list) or len(filas) != FILAS or any(len(fila) != COLUMNAS for fila in filas):
+        raise ValueError(f"El tablero debe tener {FILAS} filas de {COLUMNAS} columnas")
+    return Tablero.desde_lista(filas)
+
+
+def calcular_jugada(especificacion, player_id, filas, jugadas, tiempo_ms):
+    """Se ejecuta en el proceso trabajador; devuelve la respuesta de la petición."""
+    agente = _agente(especificacion, player_id)
+    tablero = leer_tablero({"jugadas": jugadas} if jugadas is not None else {"tablero": filas})
+    if tablero.terminado() or tablero.lleno():
+        raise ValueError("La partida ya terminó")
+    anterior = getattr(agente, "tiempo_ms", None)
+    if hasattr(agente, "tiempo_ms"):
+        # El límite se aplica dentro del trabajador: asyncio.wait_for no puede
+        # detener una búsqueda ya enviada al pool, que seguiría ocupando el proceso
+        presupuesto = tiempo_ms if tiempo_ms is not None else anterior
+        agente.tiempo_ms = LIMITE_S * 1000 if presupuesto is None else min(presupuesto, LIMITE_S * 1000)
+    try:
+        inicio = time.perf_counter()
+        columna = agente.elegir_movimiento(tablero)
+        segundos = time.perf_counter() - inicio
+    finally:
+        if hasattr(agente, "tiempo_ms"):
+            agente.tiempo_ms = anterior
+    return {
+        "columna": columna,
+        "tiempo_ms": round(segundos * 1000, 3),
+        "nodos": getattr(agente, "nodos", 0),
+        "profundidad": getattr(agente, "profundidad_alcanzada", 0),
+    }
+
+
+class Servidor:
+    """Servidor de jugadas: asyncio para las conexiones y un pool de procesos para buscar.
+
+    Cada línea recibida es una petición JSON y cada respuesta es una línea
+    JSON. Una petición lleva la especificación del agente (como en
+    torneo.crear_agente), el tablero ("tablero" o "jugadas"), opcionalmente
+    "jugador" (1 o 2; por defecto el que tiene el turno) y "tiempo_ms", que
+    se aplica al agente como presupuesto de la jugada:
+
+        {"agente": {"tipo": "minimax", "depth": 6, "alpha_beta": true},
+         "jugadas": "4453", "tiempo_ms": 500}
+        -> {"columna": 4, "tiempo_ms": 498.1, "nodos": 10512, "profundidad": 7}
+
+    Los agentes con tiempo_ms (minimax y MCTS) reciben siempre un
+    presupuesto de como máximo LIMITE_S segundos, así que la búsqueda se
+    corta en el propio proceso. Una respuesta "Tiempo agotado" no cancela el
+    trabajo ya enviado al pool: los agentes sin presupuesto (TD, el solver
+    exacto) siguen ocupando su proceso hasta terminar y las peticiones
+    siguientes esperan detrás.
+
+    {"comando": "estado"} devuelve contadores del servidor. Los agentes se
+    construyen una sola vez por proceso y los de precargar (con sus modelos)
+    se construyen al arrancar, así que las partidas no pagan la carga.
+    """
+
+    def __init__(self, direccion=DIRECCION, workers=None, precargar=()):
+        self.direccion = direccion
+        self.workers = workers or os.cpu_count()
+        self.precargar = [json.dumps(e, sort_keys=True) for e in precargar]
+        self.pool = None
+        self.servidor = None
+        self.peticiones = 0
+        self.errores = 0
+        self.conexiones = 0
+        self.inicio = None
+
+    async def iniciar(self):
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_iniciar_trabajador,
+                                        initargs=(self.precargar,))
+        # Se arrancan todos los procesos antes de aceptar peticiones
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _preparado) for _ in range(self.workers)))
+        if self.direccion.startswith("unix:"):
+            ruta = self.direccion[len("unix:"):]
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            self.servidor = await asyncio.start_unix_server(self.atender, path=ruta)
+        else:
+            host, puerto = self.direccion.rsplit(":", 1)
+            self.servidor = await asyncio.start_server(self.atender, host, int(puerto))
+        self.inicio = time.time()
+
+    async def cerrar(self):
+        if self.servidor is not None:
+            self.servidor.close()
+            await self.servidor.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def servir(self):
+        await self.iniciar()
+        print(f"Servidor en {self.direccion} con {self.workers} procesos")
+        try:
+            await self.servidor.serve_forever()
+        finally:
+            await self.cerrar()
+
+    async def atender(self, lector, escritor):
+        self.conexiones += 1
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                respuesta = await self.responder(linea)
+                escritor.write((json.dumps(respuesta) + "\n").encode())
+                await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def responder(self, linea):
+        self.peticiones += 1
+        try:
+            peticion = json.loads(linea)
+            if peticion.get("comando") == "estado":
+                return self.estado()
+            return await self.jugada(peticion)
+        except asyncio.TimeoutError:
+            self.errores += 1
+            return {"error": "Tiempo agotado"}
+        except Exception as e:
+            self.errores += 1
+            return {"error": str(e)}
+
+    async def jugada(self, peticion):
+        especificacion = json.dumps(peticion["agente"], sort_keys=True)
+        tablero = leer_tablero(peticion)
+        player_id = int(peticion.get("jugador", 1 + tablero.num_fichas() % 2))
+        tiempo_ms = peticion.get("tiempo_ms")
+        limite = min(tiempo_ms / 1000, LIMITE_S) + MARGEN_S if tiempo_ms is not None else LIMITE_S + MARGEN_S
+        loop = asyncio.get_running_loop()
+        futuro = loop.run_in_executor(self.pool, calcular_jugada, especificacion, player_id,
+                                      peticion.get("tablero"), peticion.get("jugadas"), tiempo_ms)
+        return await asyncio.wait_for(futuro, limite)
+
+    def estado(self):
+        return {
+            "peticiones": self.peticiones,
+            "errores": self.errores,
+            "conexiones": self.conexiones,
+            "workers": self.workers,
+            "segundos": round(time.time() - self.inicio, 3),
+        }
+
+
+def conectar(direccion=DIRECCION):
+    if direccion.startswith("unix:"):
+        conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conexion.connect(direccion[len("unix:"):])
+    else:
+        host, puerto = direccion.rsplit(":", 1)
+        conexion = socket.create_connection((host, int(puerto)))
+    return conexion
+
+
+def consultar(peticiones, direccion=DIRECCION):
+    """Cliente mínimo: envía las peticiones por una conexión y devuelve las respuestas."""
+    with conectar(direccion) as conexion, conexion.makefile("rw") as archivo:
+        respuestas = []
+        for peticion in peticiones:
+            archivo.write(json.dumps(peticion) + "\n")
+            archivo.flush()
+            respuestas.append(json.loads(archivo.readline()))
+        return respuestas
+
+
+def main():
+    """Uso: python servidor.py [direccion] [workers] [precargar.json]
+
+    direccion es host:puerto o unix:/ruta/al/socket; precargar.json es una
+    lista de especificaciones de agentes que se construyen al arrancar.
+    """
+    direccion = sys.argv[1] if len(sys.argv) > 1 else DIRECCION
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    precargar = []
+    if len(sys.argv) > 3:
+        with open(sys.argv[3]) as f:
+            precargar = json.load(f)
+    try:
+        asyncio.run(Servidor(direccion, workers, precargar).servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
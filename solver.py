@@ -0,0 +1,156 @@
+import sys
+import time
+
+from amenazas import casillas_ganadoras, jugables, MASCARAS_COLUMNA
+from bitboard import Tablero, FILAS, COLUMNAS, alineado
+from ordenamiento import ORDEN_CENTRO
+
+CASILLAS = FILAS * COLUMNAS
+# Máscaras de las columnas en el orden de exploración
+_COLUMNA_CENTRO = [MASCARAS_COLUMNA[col] for col in ORDEN_CENTRO]
+
+
+def _contar(mascara):
+    return bin(mascara).count('1')
+
+
+class Solver:
+    """Resuelve posiciones de forma exacta con negamax y alfa-beta.
+
+    Sigue el esquema del solver de Pascal Pons: la posición es la máscara
+    de fichas del jugador en turno más la de casillas ocupadas; nunca se
+    exploran jugadas que dejan ganar al rival en la siguiente (anticipación
+    de derrotas), las jugadas se ordenan por las amenazas que crean y el
+    valor se encuentra con búsquedas de ventana nula dentro de una búsqueda
+    binaria. La tabla de transposición guarda cotas superiores por posición.
+
+    El valor es positivo si gana el jugador en turno, negativo si pierde y 0
+    si es empate; su magnitud es mayor cuanto antes termina la partida
+    ((43 - fichas del ganador al ganar) // 2).
+    """
+
+    def __init__(self, limite_tabla=1 << 22):
+        self.tabla = {}
+        self.limite_tabla = limite_tabla
+        self.nodos = 0
+
+    def _negamax(self, propias, ocupadas, jugadas, alpha, beta):
+        self.nodos += 1
+        posibles = jugables(ocupadas)
+        rival = casillas_ganadoras(propias ^ ocupadas, ocupadas)
+        forzadas = posibles & rival
+        if forzadas:
+            if forzadas & (forzadas - 1):
+                # Dos amenazas del rival a la vez: se pierde en su próxima jugada
+                return -((CASILLAS - jugadas) // 2)
+            posibles = forzadas
+        # No se juega debajo de una casilla ganadora del rival
+        siguientes = posibles & ~(rival >> 1)
+        if not siguientes:
+            return -((CASILLAS - jugadas) // 2)
+        if jugadas >= CASILLAS - 2:
+            return 0
+
+        minimo = -((CASILLAS - 2 - jugadas) // 2)
+        if alpha < minimo:
+            alpha = minimo
+            if alpha >= beta:
+                return alpha
+        maximo = (CASILLAS - 1 - jugadas) // 2
+        clave = propias + ocupadas
+        cota = self.tabla.get(clave)
+        if cota is not None:
+            maximo = cota
+        if beta > maximo:
+            beta = maximo
+            if alpha >= beta:
+                return beta
+
+        # Primero las jugadas que dejan más casillas ganadoras propias; a
+        # igualdad, las columnas del centro
+        candidatas = []
+        for i, columna in enumerate(_COLUMNA_CENTRO):
+            jugada = siguientes & columna
+            if jugada:
+                puntaje = _contar(casillas_ganadoras(propias | jugada, ocupadas | jugada))
+                candidatas.append((-puntaje, i, jugada))
+        candidatas.sort()
+
+        rival_fichas = propias ^ ocupadas
+        for _, _, jugada in candidatas:
+            valor = -self._negamax(rival_fichas, ocupadas | jugada, jugadas + 1, -beta, -alpha)
+            if valor >= beta:
+                return valor
+            if valor > alpha:
+                alpha = valor
+
+        if len(self.tabla) >= self.limite_tabla:
+            self.tabla.clear()
+        self.tabla[clave] = alpha
+        return alpha
+
+    def valor(self, tablero, jugador=None):
+        """Valor exacto de la posición para el jugador en turno (0 o 1).
+
+        Si no se indica, el jugador en turno se deduce del número de fichas
+        suponiendo que el jugador 0 empezó la partida.
+        """
+        jugadas = tablero.num_fichas()
+        ocupadas = tablero.ocupadas()
+        propias = tablero.fichas[jugadas % 2 if jugador is None else jugador]
+        if casillas_ganadoras(propias, ocupadas) & jugables(ocupadas):
+            return (CASILLAS + 1 - jugadas) // 2
+
+        minimo = -((CASILLAS - jugadas) // 2)
+        maximo = (CASILLAS + 1 - jugadas) // 2
+        while minimo < maximo:
+            medio = minimo + (maximo - minimo) // 2
+            # Se prueba primero cerca de 0, donde suelen estar los valores
+            if medio <= 0 and int(minimo / 2) < medio:
+                medio = int(minimo / 2)
+            elif medio >= 0 and int(maximo / 2) > medio:
+                medio = int(maximo / 2)
+            resultado = self._negamax(propias, ocupadas, jugadas, medio, medio + 1)
+            if resultado <= medio:
+                maximo = resultado
+            else:
+                minimo = resultado
+        return minimo
+
+    def resolver(self, tablero, jugador=None):
+        """Devuelve (valor, columna 0-6) de la mejor jugada del jugador en turno."""
+        if jugador is None:
+            jugador = tablero.num_fichas() % 2
+        mejor_valor, mejor_columna = None, None
+        for columna in ORDEN_CENTRO:
+            if not tablero.puede_jugar(columna):
+                continue
+            tablero.jugar(columna, jugador)
+            if alineado(tablero.fichas[jugador]):
+                valor = (CASILLAS + 2 - tablero.num_fichas()) // 2
+            elif tablero.lleno():
+                valor = 0
+            else:
+                valor = -self.valor(tablero, 1 - jugador)
+            tablero.deshacer()
+            if mejor_valor is None or valor > mejor_valor:
+                mejor_valor, mejor_columna = valor, columna
+        return mejor_valor, mejor_columna
+
+
+def main():
+    """Uso: python solver.py 4453 (columnas 1-7 jugadas desde el tablero vacío)"""
+    secuencia = sys.argv[1] if len(sys.argv) > 1 else ""
+    tablero = Tablero()
+    for i, caracter in enumerate(secuencia):
+        tablero.jugar(int(caracter) - 1, i % 2)
+    solver = Solver()
+    inicio = time.perf_counter()
+    valor, columna = solver.resolver(tablero)
+    segundos = time.perf_counter() - inicio
+    print(f"Valor: {valor}, mejor columna: {columna + 1}, "
+          f"{solver.nodos} nodos en {segundos:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import numpy as np
+
+# Formato binario: cabecera de 32 bytes (MAGIA, versión, capacidad, número de
+# estados) seguida de las claves int64[capacidad] y los valores
+# float32[capacidad, 7], todo en el orden nativo de la máquina.
+MAGIA = b'C4Q1'
+VERSION = 1
+CABECERA = 32
+ACCIONES = 7
+VACIA = -1
+
+_MULTIPLICADOR = 0x9E3779B97F4A7C15
+_MASCARA_64 = (1 << 64) - 1
+
+
+def es_archivo_tabla(ruta):
+    """Indica si el archivo tiene el formato binario de TablaQ."""
+    with open(ruta, 'rb') as f:
+        return f.read(len(MAGIA)) == MAGIA
+
+
+class TablaQ:
+    """Tabla de valores Q con direccionamiento abierto sobre arreglos contiguos.
+
+    Las claves son enteros no negativos (Tablero.clave) guardados en un
+    arreglo int64 y cada una tiene una fila float32[7] de valores. Se usa
+    como el defaultdict anterior: tabla[clave] devuelve la fila (creándola en
+    ceros si no existe) y se puede modificar en el lugar. Cargada con
+    mmap=True es de solo lectura y las claves ausentes devuelven ceros sin
+    insertarse.
+    """
+
+    def __init__(self, capacidad=1 << 12):
+        capacidad = max(8, 1 << (capacidad - 1).bit_length())
+        self._asignar(np.full(capacidad, VACIA, dtype=np.int64),
+                      np.zeros((capacidad, ACCIONES), dtype=np.float32))
+        self.n = 0
+        self.solo_lectura = False
+
+    def _asignar(self, claves, valores):
+        self.claves = claves
+        self.valores = valores
+        self.capacidad = len(claves)
+        self.bits = self.capacidad.bit_length() - 1
+        # La vista de memoria devuelve enteros de Python sin pasar por escalares de NumPy
+        self._vista = memoryview(claves)
+
+    def _posicion(self, clave):
+        """Índice de la clave o de la casilla vacía donde iría (sondeo lineal)."""
+        mascara = self.capacidad - 1
+        i = ((clave * _MULTIPLICADOR) & _MASCARA_64) >> (64 - self.bits)
+        vista = self._vista
+        while True:
+            actual = vista[i]
+            if actual == clave or actual == VACIA:
+                return i
+            i = (i + 1) & mascara
+
+    def posiciones(self, claves):
+        """Versión vectorizada de _posicion para un arreglo de claves."""
+        claves = np.asarray(claves, dtype=np.int64)
+        hashes = (claves.astype(np.uint64) * np.uint64(_MULTIPLICADOR)) >> np.uint64(64 - self.bits)
+        indices = hashes.astype(np.int64)
+        pendientes = np.arange(len(claves))
+        while len(pendientes):
+            actuales = self.claves[indices[pendientes]]
+            resueltas = (actuales == claves[pendientes]) | (actuales == VACIA)
+            pendientes = pendientes[~resueltas]
+            indices[pendientes] = (indices[pendientes] + 1) & (self.capacidad - 1)
+        return indices
+
+    def indices(self, claves):
+        """Índices de las filas de un arreglo de claves, insertando las que falten."""
+        claves = np.asarray(claves, dtype=np.int64)
+        posiciones = self.posiciones(claves)
+        faltan = self.claves[posiciones] == VACIA
+        if faltan.any():
+            for clave in np.unique(claves[faltan]).tolist():
+                self[clave]
+            posiciones = self.posiciones(claves)
+        return posiciones
+
+    def valores_lote(self, claves):
+        """Valores (N, 7) de un arreglo de claves; las ausentes valen 0, sin insertarlas."""
+        claves = np.asarray(claves, dtype=np.int64)
+        posiciones = self.posiciones(claves)
+        valores = self.valores[posiciones].astype(np.float64)
+        valores[self.claves[posiciones] != claves] = 0.0
+        return valores
+
+    def __getitem__(self, clave):
+        i = self._posicion(clave)
+        if self._vista[i] == VACIA:
+            if self.solo_lectura:
+                return np.zeros(ACCIONES, dtype=np.float32)
+            if (self.n + 1) * 2 > self.capacidad:
+                self._crecer()
+                i = self._posicion(clave)
+            self.claves[i] = clave
+            self.n += 1
+        return self.valores[i]
+
+    def __setitem__(self, clave, valores):
+        self[clave][:] = valores
+
+    def __contains__(self, clave):
+        return self._vista[self._posicion(clave)] != VACIA
+
+    def __len__(self):
+        return self.n
+
+    def get(self, clave, defecto=None):
+        i = self._posicion(clave)
+        return self.valores[i] if self._vista[i] != VACIA else defecto
+
+    def keys(self):
+        return (int(clave) for clave in self.claves[self.claves != VACIA])
+
+    def items(self):
+        ocupadas = np.nonzero(self.claves != VACIA)[0]
+        return ((int(self.claves[i]), self.valores[i]) for i in ocupadas)
+
+    def _crecer(self):
+        ocupadas = self.claves != VACIA
+        claves, valores = self.claves[ocupadas], self.valores[ocupadas]
+        capacidad = self.capacidad * 2
+        self._asignar(np.full(capacidad, VACIA, dtype=np.int64),
+                      np.zeros((capacidad, ACCIONES), dtype=np.float32))
+        for clave, fila in zip(claves.tolist(), valores):
+            i = self._posicion(clave)
+            self.claves[i] = clave
+            self.valores[i] = fila
+
+    @classmethod
+    def desde_dict(cls, q_values):
+        """Construye la tabla a partir de un diccionario clave -> arreglo de 7 valores."""
+        tabla = cls(capacidad=2 * len(q_values) + 1)
+        for clave, valores in q_values.items():
+            tabla[clave] = valores
+        return tabla
+
+    def guardar(self, ruta):
+        """Escribe la tabla en el formato binario plano."""
+        cabecera = np.zeros(CABECERA, dtype=np.uint8)
+        cabecera[:4] = np.frombuffer(MAGIA, dtype=np.uint8)
+        cabecera[4:8] = np.frombuffer(np.uint32(VERSION).tobytes(), dtype=np.uint8)
+        cabecera[8:24] = np.frombuffer(np.array([self.capacidad, self.n], dtype=np.uint64).tobytes(), dtype=np.uint8)
+        with open(ruta, 'wb') as f:
+            f.write(cabecera.tobytes())
+            f.write(np.ascontiguousarray(self.claves).tobytes())
+            f.write(np.ascontiguousarray(self.valores).tobytes())
+
+    @classmethod
+    def cargar(cls, ruta, mmap=False):
+        """Lee una tabla en formato binario.
+
+        Con mmap=True los arreglos se proyectan en memoria en solo lectura, así
+        que varios procesos comparten las mismas páginas y la carga es inmediata.
+        """
+        with open(ruta, 'rb') as f:
+            cabecera = f.read(CABECERA)
+        if cabecera[:4] != MAGIA:
+            raise ValueError(f"{ruta} no es un archivo de TablaQ")
+        version = int(np.frombuffer(cabecera[4:8], dtype=np.uint32)[0])
+        if version != VERSION:
+            raise ValueError(f"Versión de TablaQ no soportada: {version}")
+        capacidad, n = (int(x) for x in np.frombuffer(cabecera[8:24], dtype=np.uint64))
+
+        if mmap:
+            claves = np.memmap(ruta, dtype=np.int64, mode='r', offset=CABECERA, shape=(capacidad,))
+            valores = np.memmap(ruta, dtype=np.float32, mode='r', offset=CABECERA + 8 * capacidad,
+                                shape=(capacidad, ACCIONES))
+        else:
+            claves = np.fromfile(ruta, dtype=np.int64, count=capacidad, offset=CABECERA)
+            valores = np.fromfile(ruta, dtype=np.float32, count=capacidad * ACCIONES,
+                                  offset=CABECERA + 8 * capacidad).reshape(capacidad, ACCIONES)
+        return cls.desde_arreglos(claves, valores, n, solo_lectura=mmap)
+
+    @classmethod
+    def desde_arreglos(cls, claves, valores, n, solo_lectura=False):
+        """Tabla sobre arreglos ya creados (por ejemplo, en memoria compartida), sin copiarlos."""
+        tabla = cls.__new__(cls)
+        tabla._asignar(claves, valores)
+        tabla.n = n
+        tabla.solo_lectura = solo_lectura
+        return tabla
@@ -2,28 +2,111 @@ import numpy as np
 import random
 import math
 import pickle
-from collections import defaultdict
 from agent import Agent
+from bitboard import Tablero, indice_jugador, FILAS, COLUMNAS
+from amenazas import recompensa_tras_jugada
+from tabla_q import TablaQ, es_archivo_tabla
+from modelo_perezoso import ModeloPerezoso, es_archivo_ordenado
+from aproximacion import AproximadorLineal
+from replay import BufferRepeticion
+from cache_oponente import CacheMovimientos
+from libro_aperturas import abrir_libro
+import checkpoints
+from td_vectorizado import EntrenadorVectorizado, fichas_lote, claves_canonicas, alineado
+
+def migrar_q_values(q_values):
+    """Convierte un modelo con claves de tuplas (formato anterior) a claves canónicas.
+
+    Los valores de una posición y de su reflejo se promedian, ignorando los
+    que nunca se actualizaron (todo ceros).
+    """
+    acumulados = {}
+    for clave, valores in q_values.items():
+        valores = np.array(valores, dtype=float)
+        if isinstance(clave, tuple):
+            clave, espejada = Tablero.desde_lista(clave).clave_canonica()
+            if espejada:
+                valores = valores[::-1].copy()
+        acumulados.setdefault(clave, []).append(valores)
+
+    migrados = {}
+    for clave, lista in acumulados.items():
+        aprendidos = [valores for valores in lista if np.any(valores)]
+        migrados[clave] = np.mean(aprendidos, axis=0) if aprendidos else lista[0]
+    return migrados
+
 
 class TDAgent:
-    def __init__(self, player_id, epsilon=1.0, alpha=0.005, gamma=0.9, load_file=None):
+    def __init__(self, player_id, epsilon=1.0, alpha=0.005, gamma=0.9, load_file=None, aproximacion=None,
+                 memoria=100000, priorizado=False, lote=32, libro=None):
         self.id = str(player_id)
         self.opponent_id = '2' if self.id == '1' else '1'
+        self.indice = indice_jugador(self.id)
+        self.indice_oponente = 1 - self.indice
         self.epsilon = epsilon  # Probabilidad de exploración
         self.alpha = alpha      # Tasa de aprendizaje
         self.gamma = gamma      # Factor de descuento
-        self.q_values = defaultdict(lambda: np.zeros(7))  # Valores Q para cada par estado-acción
+        self.q_values = TablaQ()  # Valores Q para cada par estado-acción
+
+        # Con aproximacion='lineal' los valores Q salen de un AproximadorLineal
+        # en lugar de la tabla
+        if aproximacion == 'lineal':
+            self.aproximador = AproximadorLineal(self.indice, alpha=alpha, gamma=gamma)
+        elif aproximacion is None:
+            self.aproximador = None
+        else:
+            raise ValueError(f"Aproximación desconocida: {aproximacion}")
+
+        # Memoria de repetición de transiciones; el aproximador aprende cada
+        # transición junto con un mini-lote de ella, y aprender(repasos=n) la
+        # repasa al final de cada episodio
+        self.capacidad_memoria = memoria
+        self.priorizado = priorizado
+        self.lote = lote
+        self.memoria = None
+        if self.aproximador is not None:
+            self.crear_memoria()
+
+        # Claves modificadas desde el último checkpoint (None si no se guardan checkpoints)
+        self.sucios = None
+
+        # Libro de aperturas opcional; elegir_movimiento lo consulta antes que la política
+        self.libro = abrir_libro(libro)
         
         if load_file:
             try:
-                with open(load_file, 'rb') as f:
-                    self.q_values = pickle.load(f)
+                if load_file.endswith('.npz'):
+                    self.aproximador = self.aproximador or AproximadorLineal(self.indice, alpha=alpha, gamma=gamma)
+                    self.aproximador.cargar(load_file)
+                    self.crear_memoria()
+                else:
+                    self.q_values = self._cargar_q_values(load_file)
             except FileNotFoundError:
                 print(f"No se encontró el archivo {load_file}, iniciando con valores Q por defecto.")
 
     def estado_a_clave(self, tablero):
         """Convierte el estado del tablero en una clave para el diccionario de valores Q."""
-        return tuple(tuple(row) for row in tablero)
+        return self.clave_canonica(tablero)[0]
+
+    def clave_canonica(self, tablero):
+        """Devuelve (clave, espejada) para una lista o un Tablero.
+
+        Una posición y su reflejo comparten clave; si espejada es True, la
+        acción a se guarda en la posición 6 - a del arreglo de valores Q.
+        """
+        if not isinstance(tablero, Tablero):
+            tablero = Tablero.desde_lista(tablero)
+        if self.aproximador is not None:
+            # El aproximador trabaja sobre la posición exacta
+            return tablero.clave(), False
+        return tablero.clave_canonica()
+
+    def valores_q(self, tablero, clave, espejada):
+        """Valores Q de las 7 columnas de un Tablero, en su orientación real."""
+        if self.aproximador is not None:
+            return self.aproximador.valores_tablero(tablero)
+        valores = self.q_values[clave]
+        return valores[::-1] if espejada else valores
 
     def movimiento_valido(self, tablero, columna):
         """Verifica si un movimiento es válido."""
@@ -45,138 +128,334 @@ class TDAgent:
         return nuevo_tablero
 
     def calcular_recompensa(self, tablero, accion, player_id):
-        """Calcula la recompensa para un movimiento."""
-        nuevo_tablero = self.simular_movimiento(tablero, accion, player_id)
-        
-        # Verifica victoria
-        if self.check_victoria(nuevo_tablero, player_id):
-            return 1.0
-        
-        # Verifica derrota (victoria del oponente en su próximo movimiento)
-        for col in self.movimientos_validos(nuevo_tablero):
-            tablero_oponente = self.simular_movimiento(nuevo_tablero, col, self.opponent_id)
-            if self.check_victoria(tablero_oponente, self.opponent_id):
-                return -1.0
-        
-        # Posición de amenaza (victoria en el próximo movimiento)
-        for col in self.movimientos_validos(nuevo_tablero):
-            tablero_amenaza = self.simular_movimiento(nuevo_tablero, col, player_id)
-            if self.check_victoria(tablero_amenaza, player_id):
-                return 0.5
-        
-        # Recompensa por control del centro
-        centro = [fila[3] for fila in nuevo_tablero]
-        recompensa_centro = 0.1 * centro.count(player_id) / 6
-        
-        return recompensa_centro
+        """Calcula la recompensa para un movimiento (accion en 1-7)."""
+        if not isinstance(tablero, Tablero):
+            tablero = Tablero.desde_lista(tablero)
+        jugador = indice_jugador(player_id)
+        columna = (accion - 1) % COLUMNAS  # Como el índice -1 de simular_movimiento
+        jugada = tablero.puede_jugar(columna)
+        if jugada:
+            tablero.jugar(columna, jugador)
+        try:
+            return self.recompensa_tras_jugada(tablero, jugador)
+        finally:
+            if jugada:
+                tablero.deshacer()
+
+    def recompensa_tras_jugada(self, tablero, jugador):
+        """Recompensa de la jugada que jugador acaba de hacer en el Tablero."""
+        return recompensa_tras_jugada(tablero, jugador, self.indice_oponente)
 
     def elegir_movimiento(self, tablero):
         """Elige una acción usando la política epsilon-greedy."""
-        clave_estado = self.estado_a_clave(tablero)
-        acciones_validas = self.movimientos_validos(tablero)
+        if not isinstance(tablero, Tablero):
+            tablero = Tablero.desde_lista(tablero)
+        clave_estado, espejada = self.clave_canonica(tablero)
+        acciones_validas = tablero.movimientos_validos()
         
         if not acciones_validas:
             return None
+
+        if self.libro is not None:
+            jugada = self.libro.buscar(tablero)
+            if jugada is not None:
+                return jugada + 1
         
         # Exploración
         if random.random() < self.epsilon:
             return random.choice(acciones_validas) + 1  
         
         # Explotación
-        q_valores = self.q_values[clave_estado]
+        q_valores = self.valores_q(tablero, clave_estado, espejada)
         # Filtrar solo acciones válidas
         valores_validos = [(accion, q_valores[accion]) for accion in acciones_validas]
         mejor_accion = max(valores_validos, key=lambda x: x[1])[0]
         
         return mejor_accion + 1  
 
+    def elegir_movimientos_lote(self, tableros):
+        """elegir_movimiento para muchas posiciones a la vez.
+
+        tableros es un arreglo (N, 6, 7) con 0, 1 y 2 (fila 0 arriba, como
+        get_estado_tablero) o de máscaras (N, 2) como Tablero.fichas. Devuelve
+        las columnas elegidas (1-7, 0 si la partida ya terminó) y su valor Q; la tabla
+        se consulta con una sola búsqueda vectorizada para todas las claves.
+        """
+        fichas, alturas = fichas_lote(tableros)
+        validas = alturas < FILAS
+        if self.aproximador is not None:
+            q = self.aproximador.valores_acciones(fichas, alturas)
+        else:
+            claves, espejadas = claves_canonicas(fichas)
+            q = self.q_values.valores_lote(claves.astype(np.int64))
+            q[espejadas] = q[espejadas, ::-1]
+        q = np.where(validas, q, -np.inf)
+        movimientos = q.argmax(axis=1)
+
+        # Exploración: una columna válida al azar con probabilidad epsilon
+        explorar = np.random.random(len(q)) < self.epsilon
+        if explorar.any():
+            azar = np.random.random((explorar.sum(), COLUMNAS)) * validas[explorar]
+            movimientos[explorar] = azar.argmax(axis=1)
+        if self.libro is not None:
+            libro = self.libro.buscar_lote(fichas, alturas)
+            movimientos = np.where(libro >= 0, libro, movimientos)
+
+        puntajes = q[np.arange(len(q)), movimientos]
+        # Las posiciones llenas o ya ganadas no tienen jugada
+        sin_jugadas = ~validas.any(axis=1) | alineado(fichas).any(axis=1)
+        puntajes[sin_jugadas] = np.nan
+        return np.where(sin_jugadas, 0, movimientos + 1).astype(np.int8), puntajes
+
     def actualizar_q(self, estado, accion, recompensa, nuevo_estado):
         """Actualiza los valores Q usando TD Learning."""
-        clave_estado = self.estado_a_clave(estado)
+        clave_estado, espejada = self.clave_canonica(estado)
         clave_nuevo_estado = self.estado_a_clave(nuevo_estado)
-        
+        terminal = not self.movimientos_validos(nuevo_estado)
+        self.actualizar_q_clave(clave_estado, 6 - accion if espejada else accion, recompensa,
+                                clave_nuevo_estado, terminal)
+
+    def actualizar_q_clave(self, clave_estado, accion, recompensa, clave_nuevo_estado, terminal):
+        """Misma actualización que actualizar_q sobre claves canónicas y acción ya reflejada."""
+        if self.aproximador is not None:
+            # El aproximador siempre aprende con la memoria, aunque se haya cargado después
+            indice = self.crear_memoria().agregar(clave_estado, accion, recompensa, clave_nuevo_estado, terminal)
+            self.repasar(self.lote - 1, incluir=indice)
+            return
+        if self.memoria is not None:
+            self.memoria.agregar(clave_estado, accion, recompensa, clave_nuevo_estado, terminal)
+        self._actualizar_tabla(clave_estado, accion, recompensa, clave_nuevo_estado, terminal)
+
+    def _actualizar_tabla(self, clave_estado, accion, recompensa, clave_nuevo_estado, terminal):
+        """Actualización de TD sobre la tabla Q; devuelve el error de TD."""
         # Obtener el valor Q máximo para el nuevo estado
-        q_max_nuevo = max(self.q_values[clave_nuevo_estado]) if self.movimientos_validos(nuevo_estado) else 0
+        q_max_nuevo = 0 if terminal else max(self.q_values[clave_nuevo_estado])
         
         # Actualizar el valor Q para el par estado-acción actual
         q_actual = self.q_values[clave_estado][accion]
-        self.q_values[clave_estado][accion] = q_actual + self.alpha * (
-            recompensa + self.gamma * q_max_nuevo - q_actual
-        )
+        error = recompensa + self.gamma * q_max_nuevo - q_actual
+        self.q_values[clave_estado][accion] = q_actual + self.alpha * error
+        if self.sucios is not None:
+            self.sucios.add(clave_estado)
+        return error
+
+    def crear_memoria(self):
+        if self.memoria is None:
+            self.memoria = BufferRepeticion(self.capacidad_memoria, priorizado=self.priorizado)
+        return self.memoria
+
+    def repasar(self, tamano=None, incluir=None):
+        """Vuelve a aprender un mini-lote de transiciones tomadas de la memoria.
+
+        incluir es el índice de una transición que se agrega al lote (la
+        recién observada, en el caso del aproximador).
+        """
+        indices = self.memoria.muestrear(self.lote if tamano is None else tamano)
+        if incluir is not None:
+            indices = np.append(indices, incluir)
+        if len(indices) == 0:
+            return
+        transiciones = self.memoria.transiciones(indices)
+        if self.aproximador is not None:
+            errores = self.aproximador.actualizar_lote(*transiciones)
+        else:
+            errores = np.array([self._actualizar_tabla(*t) for t in zip(*(a.tolist() for a in transiciones))])
+        self.memoria.actualizar_prioridades(indices, errores)
+
+    def aprender(self, episodios=1000, repasos=0, cache_oponente=None, checkpoint=None, cada=100,
+                 reanudar=True):
+        """Entrena contra Minimax.
+
+        repasos es el número de mini-lotes de la memoria de repetición que se
+        vuelven a aprender al final de cada episodio. Con cache_oponente
+        (True o un archivo SQLite) las jugadas de Minimax se recuerdan entre
+        episodios y, con archivo, entre ejecuciones.
+
+        Con checkpoint (un directorio) cada cierto número de episodios se
+        guardan los estados modificados con checkpoints.Checkpoints; si
+        reanudar es True y el directorio ya tiene un checkpoint, la tabla, el
+        epsilon y el episodio se recuperan de él y se entrena hasta completar
+        episodios.
+        """
+        inicio = 0
+        escritor = None
+        if checkpoint:
+            if self.aproximador is not None:
+                raise ValueError("Los checkpoints incrementales solo funcionan con la tabla Q")
+            if reanudar:
+                inicio = self.cargar_checkpoint(checkpoint)
+            escritor = checkpoints.Checkpoints(checkpoint, reiniciar=not reanudar)
+            # El primer checkpoint de un directorio vacío lleva la tabla completa
+            self.sucios = set() if not escritor.vacio() else set(self.q_values.keys())
 
-    def aprender(self, episodios=1000):
         minimax = Agent(depth=3, player_id=self.opponent_id, alpha_beta=False)
+        if cache_oponente:
+            minimax = CacheMovimientos(minimax, None if cache_oponente is True else cache_oponente)
+        if repasos:
+            self.crear_memoria()
 
-        for episodio in range(episodios):
+        for episodio in range(inicio, episodios):
             if episodio % 100 == 0:
                 print(f"Episodio {episodio}/{episodios}")
 
-            tablero = [[0 for _ in range(7)] for _ in range(6)]
+            tablero = Tablero()
             jugador_actual = self.id
             game_over = False
 
             while not game_over:
-                acciones_validas = self.movimientos_validos(tablero)
+                acciones_validas = tablero.movimientos_validos()
                 if not acciones_validas:
                     break  # empate
 
                 if jugador_actual == self.id:
-                    clave_estado = self.estado_a_clave(tablero)
+                    clave_estado, espejada = self.clave_canonica(tablero)
 
                     if random.random() < self.epsilon:
                         accion = random.choice(acciones_validas)
                     else:
-                        valores_q = [(a, self.q_values[clave_estado][a]) for a in acciones_validas]
+                        valores = self.valores_q(tablero, clave_estado, espejada)
+                        valores_q = [(a, valores[a]) for a in acciones_validas]
                         accion = max(valores_q, key=lambda x: x[1])[0]
 
-                    accion_jugada = accion + 1  # +1 porque usarás columna 1-7
-                    nuevo_tablero = self.simular_movimiento(tablero, accion_jugada, self.id)
+                    accion_q = 6 - accion if espejada else accion
+                    tablero.jugar(accion, self.indice)
+                    clave_nuevo_estado = self.clave_canonica(tablero)[0]
 
-                    if self.check_victoria(nuevo_tablero, self.id):
+                    if tablero.gana(self.indice):
                         recompensa = 1.0
-                        self.actualizar_q(tablero, accion, recompensa, nuevo_tablero)
+                        self.actualizar_q_clave(clave_estado, accion_q, recompensa, clave_nuevo_estado, tablero.lleno())
                         game_over = True
                         continue
-                    elif not self.movimientos_validos(nuevo_tablero):
+                    elif tablero.lleno():
                         recompensa = 0.0
-                        self.actualizar_q(tablero, accion, recompensa, nuevo_tablero)
+                        self.actualizar_q_clave(clave_estado, accion_q, recompensa, clave_nuevo_estado, True)
                         game_over = True
                         continue
 
-                    recompensa = self.calcular_recompensa(tablero, accion_jugada, self.id)
-                    self.actualizar_q(tablero, accion, recompensa, nuevo_tablero)
+                    recompensa = self.recompensa_tras_jugada(tablero, self.indice)
+                    self.actualizar_q_clave(clave_estado, accion_q, recompensa, clave_nuevo_estado, False)
 
-                    tablero = nuevo_tablero
                     jugador_actual = self.opponent_id
 
                 else:
                     accion_minimax = minimax.elegir_movimiento(tablero)
-                    tablero = self.simular_movimiento(tablero, accion_minimax, self.opponent_id)
+                    tablero.jugar(accion_minimax - 1, self.indice_oponente)
 
-                    if self.check_victoria(tablero, self.opponent_id):
+                    if tablero.gana(self.indice_oponente):
                         recompensa = -1.0
-                        self.actualizar_q(tablero, accion_minimax - 1, recompensa, tablero)
+                        if self.aproximador is not None:
+                            # La derrota se atribuye a la última jugada del agente
+                            self.actualizar_q_clave(clave_estado, accion_q, recompensa, clave_nuevo_estado, True)
+                        else:
+                            clave, espejada = tablero.clave_canonica()
+                            accion_q = 7 - accion_minimax if espejada else accion_minimax - 1
+                            self.actualizar_q_clave(clave, accion_q, recompensa, clave, tablero.lleno())
                         game_over = True
                         continue
 
                     jugador_actual = self.id
 
+            for _ in range(repasos):
+                self.repasar()
+
             self.epsilon = max(0.2, self.epsilon * 0.995)
+            if escritor is not None and (episodio + 1) % cada == 0:
+                self.guardar_checkpoint(escritor, episodio + 1)
 
+        if escritor is not None:
+            if self.sucios:
+                self.guardar_checkpoint(escritor, max(episodios, inicio))
+            escritor.cerrar()
+            self.sucios = None
+        if cache_oponente:
+            minimax.cerrar()
+            print(f"Cache del oponente: {minimax.tasa_aciertos():.1%} de aciertos")
         print("Entrenamiento completado.")
 
 
+    def guardar_checkpoint(self, escritor, episodio):
+        """Envía al escritor los estados modificados desde el checkpoint anterior."""
+        claves = np.fromiter(self.sucios, dtype=np.int64, count=len(self.sucios))
+        self.sucios = set()
+        # Solo se copian las filas modificadas; la escritura sigue en otro hilo
+        valores = self.q_values.valores[self.q_values.posiciones(claves)].copy()
+        escritor.guardar(claves, valores, {"episodio": episodio, "epsilon": self.epsilon})
+
+    def cargar_checkpoint(self, directorio):
+        """Recupera la tabla y el epsilon del último checkpoint; devuelve su episodio (0 si no hay)."""
+        tabla, estado = checkpoints.cargar(directorio)
+        if tabla is None:
+            return 0
+        self.q_values = tabla
+        self.epsilon = estado["epsilon"]
+        print(f"Reanudando desde el episodio {estado['episodio']} (epsilon {self.epsilon:.3f})")
+        return estado["episodio"]
+
+    def aprender_vectorizado(self, episodios=1000, n_partidas=256, oponente=None):
+        """Entrena jugando n_partidas a la vez (ver td_vectorizado.EntrenadorVectorizado)."""
+        if self.aproximador is not None:
+            raise ValueError("El entrenamiento vectorizado solo funciona con la tabla Q")
+        entrenador = EntrenadorVectorizado(self, n_partidas=n_partidas, oponente=oponente)
+        entrenador.entrenar(episodios)
+        print("Entrenamiento completado.")
+
+    def aprender_paralelo(self, episodios=1000, workers=None, episodios_por_ronda=50, combinar="promedio"):
+        """Entrena con varios procesos a la vez (ver td_paralelo.EntrenadorParalelo)."""
+        from td_paralelo import EntrenadorParalelo
+
+        if self.aproximador is not None:
+            raise ValueError("El entrenamiento paralelo solo funciona con la tabla Q")
+        EntrenadorParalelo(self, workers=workers, episodios_por_ronda=episodios_por_ronda,
+                           combinar=combinar).entrenar(episodios)
+        print("Entrenamiento completado.")
+
     def guardar_modelo(self, filename):
-        """Guarda el modelo de valores Q en un archivo."""
-        with open(filename, 'wb') as f:
-            pickle.dump(dict(self.q_values), f)
+        """Guarda el modelo de valores Q en un archivo.
+
+        Los archivos .pkl usan pickle; cualquier otra extensión usa el formato
+        binario de TablaQ, que cargar_modelo puede proyectar en memoria. Con
+        un aproximador se guardan sus pesos en formato .npz.
+        """
+        if self.aproximador is not None:
+            self.aproximador.guardar(filename)
+        elif filename.endswith('.pkl'):
+            with open(filename, 'wb') as f:
+                pickle.dump({clave: np.array(valores, dtype=float) for clave, valores in self.q_values.items()}, f)
+        else:
+            self.q_values.guardar(filename)
         print(f"Modelo guardado en {filename}")
 
-    def cargar_modelo(self, filename):
-        """Carga el modelo de valores Q desde un archivo."""
+    def _leer_q_values(self, archivo):
+        """Lee un modelo guardado con pickle, migrando el formato de claves anterior."""
+        q_values = pickle.load(archivo)
+        if q_values and isinstance(next(iter(q_values)), tuple):
+            q_values = migrar_q_values(q_values)
+        return q_values
+
+    def _cargar_q_values(self, filename, mmap=False):
+        if es_archivo_ordenado(filename):
+            return ModeloPerezoso(filename)
+        if es_archivo_tabla(filename):
+            return TablaQ.cargar(filename, mmap=mmap)
+        with open(filename, 'rb') as f:
+            return TablaQ.desde_dict(self._leer_q_values(f))
+
+    def cargar_modelo(self, filename, mmap=False):
+        """Carga el modelo de valores Q desde un archivo.
+
+        Con mmap=True un modelo en formato binario se abre en solo lectura sin
+        copiarlo a memoria, útil para compartirlo entre procesos de inferencia.
+        Un modelo en el formato ordenado de modelo_perezoso se abre siempre
+        con ModeloPerezoso, que lee los estados del disco a medida que se usan.
+        """
         try:
-            with open(filename, 'rb') as f:
-                self.q_values = defaultdict(lambda: np.zeros(7), pickle.load(f))
+            if filename.endswith('.npz'):
+                if self.aproximador is None:
+                    self.aproximador = AproximadorLineal(self.indice, alpha=self.alpha, gamma=self.gamma)
+                    self.crear_memoria()
+                self.aproximador.cargar(filename)
+            else:
+                self.q_values = self._cargar_q_values(filename, mmap=mmap)
             print(f"Modelo cargado desde {filename}")
         except FileNotFoundError:
             print(f"No se encontró el archivo {filename}")
@@ -1,46 +1,10 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from connect4 import Connect4
-from agent import Agent
 from td_agent import TDAgent
-from player import Player
+from torneo import jugar_torneo, leer_resultados
+from instrumentacion import resumir
 import time
 
-def jugar_partida(player1, player2, verbose=False):
-    """Juega una partida entre dos jugadores y devuelve el resultado."""
-    game = Connect4(usar_turtle= False)
-    game.player1 = player1
-    game.player2 = player2
-    game.jugador_actual = player1
-    
-    #game.crear_tablero()
-    
-    while True:
-        try:
-            if verbose:
-                print(f"Turno de {game.jugador_actual.color}")
-            
-            if game.jugador_actual.agent:
-                columna = game.jugador_actual.agent.elegir_movimiento(game.get_estado_tablero())
-                if verbose:
-                    print(f"Columna elegida: {columna}")
-            else:
-                raise ValueError("Este script requiere jugadores con agentes.")
-            
-            resultado = game.colocar_ficha(columna)
-            if resultado:
-                return "player1" if game.jugador_actual == player1 else "player2"
-            
-            if all(game.espaciosY[i] >= 6 for i in range(1, 8)):
-                if verbose:
-                    print("¡Empate!")
-                return "empate"
-                
-        except Exception as e:
-            if verbose:
-                print(f"Error: {e}")
-            return "error"
-
 def entrenar_agente_td(jugador_id=1, episodios=5000, guardar_en="td_model.pkl"):
     """Entrena un agente TD Learning y lo guarda en disco."""
     print(f"Entrenando agente TD Learning para el jugador {jugador_id}...")
@@ -49,43 +13,44 @@ def entrenar_agente_td(jugador_id=1, episodios=5000, guardar_en="td_model.pkl"):
     td_agent.guardar_modelo(guardar_en)
     return td_agent
 
-def evaluar_agentes(td_agent, minimax_agent, alpha_beta_agent, num_partidas=50):
-    """Evalúa el rendimiento de TD Learning contra Minimax y Alpha-Beta."""
-    resultados = {
-        "TD vs Minimax": {"td_win": 0, "minimax_win": 0, "empate": 0},
-        "TD vs Alpha-Beta": {"td_win": 0, "alpha_beta_win": 0, "empate": 0},
-        "Minimax vs Alpha-Beta": {"minimax_win": 0, "alpha_beta_win": 0, "empate": 0}
+def evaluar_agentes_torneo(modelo_td, depth_minimax=3, depth_alpha_beta=3, num_partidas=50,
+                           epsilon_td=0.2, archivo="resultados_torneo.jsonl", workers=None, instrumentar=False,
+                           reanudar=True):
+    """Evalúa los mismos enfrentamientos con el torneo en paralelo de torneo.py.
+
+    Los colores se alternan entre partidas y, con reanudar=True, una
+    ejecución interrumpida se retoma desde el archivo de resultados. Los
+    registros se reconocen solo por el id de la partida, así que con un
+    modelo nuevo hay que usar reanudar=False.
+    """
+    agentes = {
+        "td": {"tipo": "td", "modelo": modelo_td, "epsilon": epsilon_td},
+        "minimax": {"tipo": "minimax", "depth": depth_minimax, "alpha_beta": False},
+        "alpha_beta": {"tipo": "minimax", "depth": depth_alpha_beta, "alpha_beta": True},
     }
-    
-    player_td = Player("Red", td_agent, nombre_agente="TD Learning")
-    player_minimax = Player("Blue", minimax_agent, nombre_agente="Minimax")
-    player_alpha_beta = Player("Purple", alpha_beta_agent, nombre_agente="MinimaxAB")
-    
-    print(f"Evaluando TD vs Minimax ({num_partidas} partidas)...")
-    resultados = jugar_y_registrar_partidas(player_td, player_minimax, num_partidas, resultados, "TD vs Minimax", "td_win", "minimax_win")
-    
-    print(f"Evaluando TD vs Alpha-Beta ({num_partidas} partidas)...")
-    resultados = jugar_y_registrar_partidas(player_td, player_alpha_beta, num_partidas, resultados, "TD vs Alpha-Beta", "td_win", "alpha_beta_win")
-    
-    print(f"Evaluando Minimax vs Alpha-Beta ({num_partidas} partidas)...")
-    resultados = jugar_y_registrar_partidas(player_minimax, player_alpha_beta, num_partidas, resultados, "Minimax vs Alpha-Beta", "minimax_win", "alpha_beta_win")
-    
-    return resultados
+    resumen = jugar_torneo(agentes, num_partidas, archivo, workers=workers, instrumentar=instrumentar,
+                           reanudar=reanudar)
+
+    def conteo(a, b):
+        return resumen.get(tuple(sorted((a, b))), {a: 0, b: 0, "empate": 0, "error": 0})
 
-def jugar_y_registrar_partidas(player1, player2, num_partidas, resultados, key, win_key1, win_key2):
-    """Juega y registra los resultados de las partidas."""
-    for i in range(num_partidas):
-        if i % 10 == 0:
-            print(f"Partida {i}/{num_partidas}")
-        
-        resultado = jugar_partida(player1, player2)
-        if resultado == "player1":
-            resultados[key][win_key1] += 1
-        elif resultado == "player2":
-            resultados[key][win_key2] += 1
-        else:
-            resultados[key]["empate"] += 1
-    return resultados
+    td_minimax = conteo("td", "minimax")
+    td_alpha_beta = conteo("td", "alpha_beta")
+    minimax_alpha_beta = conteo("minimax", "alpha_beta")
+    return {
+        "TD vs Minimax": {"td_win": td_minimax["td"], "minimax_win": td_minimax["minimax"],
+                          "empate": td_minimax["empate"], "error": td_minimax["error"]},
+        "TD vs Alpha-Beta": {"td_win": td_alpha_beta["td"], "alpha_beta_win": td_alpha_beta["alpha_beta"],
+                             "empate": td_alpha_beta["empate"], "error": td_alpha_beta["error"]},
+        "Minimax vs Alpha-Beta": {"minimax_win": minimax_alpha_beta["minimax"],
+                                  "alpha_beta_win": minimax_alpha_beta["alpha_beta"],
+                                  "empate": minimax_alpha_beta["empate"], "error": minimax_alpha_beta["error"]},
+    }
+
+def resumen_instrumentacion(archivo="resultados_torneo.jsonl"):
+    """Agrega por agente los perfiles por jugada guardados en los resultados del torneo."""
+    registros = [jugada for partida in leer_resultados(archivo) for jugada in partida.get("perfil", [])]
+    return resumir(registros)["agentes"]
 
 def crear_graficas(resultados):
     """Crea gráficas de los resultados y las guarda en disco."""
@@ -129,20 +94,27 @@ def main():
     
     print("Creando agentes...")
     td_agent = entrenar_agente_td(jugador_id=1, episodios=episodios_td)
-    minimax_agent = Agent(depth=depth_minimax, player_id=2, alpha_beta=False)
-    alpha_beta_agent = Agent(depth=depth_alpha_beta, player_id=2, alpha_beta=True)
     
-    resultados = evaluar_agentes(
-        td_agent=td_agent,
-        minimax_agent=minimax_agent,
-        alpha_beta_agent=alpha_beta_agent,
-        num_partidas=num_partidas
+    resultados = evaluar_agentes_torneo(
+        modelo_td="td_model.pkl",
+        depth_minimax=depth_minimax,
+        depth_alpha_beta=depth_alpha_beta,
+        num_partidas=num_partidas,
+        epsilon_td=td_agent.epsilon,
+        instrumentar=True,
+        # El modelo se acaba de reentrenar: los resultados anteriores son de otro modelo
+        reanudar=False
     )
     
     print("\nResultados:")
-    print(f"TD vs Minimax: TD gana {resultados['TD vs Minimax']['td_win']}, Minimax gana {resultados['TD vs Minimax']['minimax_win']}, Empates {resultados['TD vs Minimax']['empate']}")
-    print(f"TD vs Alpha-Beta: TD gana {resultados['TD vs Alpha-Beta']['td_win']}, Alpha-Beta gana {resultados['TD vs Alpha-Beta']['alpha_beta_win']}, Empates {resultados['TD vs Alpha-Beta']['empate']}")
-    print(f"Minimax vs Alpha-Beta: Minimax gana {resultados['Minimax vs Alpha-Beta']['minimax_win']}, Alpha-Beta gana {resultados['Minimax vs Alpha-Beta']['alpha_beta_win']}, Empates {resultados['Minimax vs Alpha-Beta']['empate']}")
+    print(f"TD vs Minimax: TD gana {resultados['TD vs Minimax']['td_win']}, Minimax gana {resultados['TD vs Minimax']['minimax_win']}, Empates {resultados['TD vs Minimax']['empate']}, Errores {resultados['TD vs Minimax']['error']}")
+    print(f"TD vs Alpha-Beta: TD gana {resultados['TD vs Alpha-Beta']['td_win']}, Alpha-Beta gana {resultados['TD vs Alpha-Beta']['alpha_beta_win']}, Empates {resultados['TD vs Alpha-Beta']['empate']}, Errores {resultados['TD vs Alpha-Beta']['error']}")
+    print(f"Minimax vs Alpha-Beta: Minimax gana {resultados['Minimax vs Alpha-Beta']['minimax_win']}, Alpha-Beta gana {resultados['Minimax vs Alpha-Beta']['alpha_beta_win']}, Empates {resultados['Minimax vs Alpha-Beta']['empate']}, Errores {resultados['Minimax vs Alpha-Beta']['error']}")
+    
+    print("\nRendimiento por agente:")
+    for nombre, datos in resumen_instrumentacion().items():
+        print(f"{nombre}: {datos['ms_por_jugada']} ms/jugada, {datos['nodos_por_s']} nodos/s, "
+              f"ramificación {datos['ramificacion']}, profundidad media {datos['profundidad_media']}")
     
     crear_graficas(resultados)
     print("\nGráficas guardadas en 'resultados_connect4.png'")
@@ -0,0 +1,197 @@
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tabla_q import TablaQ, ACCIONES
+
+# Agente de entrenamiento de cada proceso trabajador, por (player_id, alpha, gamma)
+_agentes = {}
+
+
+def _arreglos(memoria, capacidad):
+    """Vistas de claves y valores de una tabla guardada en memoria compartida."""
+    claves = np.ndarray((capacidad,), dtype=np.int64, buffer=memoria.buf)
+    valores = np.ndarray((capacidad, ACCIONES), dtype=np.float32, buffer=memoria.buf, offset=8 * capacidad)
+    return claves, valores
+
+
+def _entrenar_ronda(nombre, capacidad, n, player_id, alpha, gamma, epsilon, episodios, semilla):
+    """Juega episodios sobre una copia de la tabla compartida; devuelve los cambios.
+
+    El resultado son las claves modificadas y la diferencia de sus valores
+    respecto a la tabla compartida al inicio de la ronda.
+    """
+    from td_agent import TDAgent
+
+    clave = (player_id, alpha, gamma)
+    if clave not in _agentes:
+        _agentes[clave] = TDAgent(player_id, alpha=alpha, gamma=gamma)
+    agente = _agentes[clave]
+
+    memoria = shared_memory.SharedMemory(name=nombre)
+    try:
+        base = TablaQ.desde_arreglos(*_arreglos(memoria, capacidad), n, solo_lectura=True)
+        agente.q_values = TablaQ.desde_arreglos(base.claves.copy(), base.valores.copy(), n)
+        agente.epsilon = epsilon
+        agente.sucios = set()
+        random.seed(semilla)
+        with contextlib.redirect_stdout(io.StringIO()):
+            agente.aprender(episodios=episodios)
+
+        claves = np.fromiter(agente.sucios, dtype=np.int64, count=len(agente.sucios))
+        agente.sucios = None
+        nuevos = agente.q_values.valores[agente.q_values.posiciones(claves)]
+        posiciones = base.posiciones(claves)
+        anteriores = np.where((base.claves[posiciones] == claves)[:, None], base.valores[posiciones], 0.0)
+        diferencias = (nuevos - anteriores).astype(np.float32)
+    finally:
+        # Las vistas sobre la memoria compartida deben soltarse antes de cerrarla
+        base = None
+        memoria.close()
+    return claves, diferencias
+
+
+class EntrenadorParalelo:
+    """Entrena un TDAgent con varios procesos que juegan contra Minimax a la vez.
+
+    El entrenamiento avanza por rondas. En cada una la tabla Q del agente se
+    copia a un bloque de memoria compartida, cada uno de los workers procesos
+    la copia, juega episodios_por_ronda episodios con TDAgent.aprender (con
+    su propio Minimax de profundidad 3) y devuelve solo las claves que
+    modificó con la diferencia de sus valores. Las diferencias se combinan
+    sobre la tabla del agente: con combinar="promedio" cada estado recibe el
+    promedio de las diferencias de los procesos que lo modificaron, y con
+    "suma" la suma de todas.
+
+    epsilon decae como en aprender según el total de episodios jugados.
+    """
+
+    def __init__(self, agente, workers=None, episodios_por_ronda=50, combinar="promedio"):
+        if combinar not in ("promedio", "suma"):
+            raise ValueError(f"Combinación desconocida: {combinar}")
+        self.agente = agente
+        self.workers = workers or os.cpu_count()
+        self.episodios_por_ronda = episodios_por_ronda
+        self.combinar = combinar
+        self.memoria = None
+        self.capacidad = None
+        self.generador = random.Random()
+
+    def _publicar(self):
+        """Copia la tabla del agente a la memoria compartida; devuelve (nombre, capacidad, n)."""
+        tabla = self.agente.q_values
+        if self.memoria is None or self.capacidad != tabla.capacidad:
+            self._liberar()
+            self.memoria = shared_memory.SharedMemory(create=True, size=tabla.capacidad * (8 + 4 * ACCIONES))
+            self.capacidad = tabla.capacidad
+        claves, valores = _arreglos(self.memoria, self.capacidad)
+        claves[:] = tabla.claves
+        valores[:] = tabla.valores
+        return self.memoria.name, self.capacidad, tabla.n
+
+    def _liberar(self):
+        if self.memoria is not None:
+            self.memoria.close()
+            self.memoria.unlink()
+            self.memoria = None
+
+    def combinar_cambios(self, cambios):
+        """Aplica a la tabla del agente las diferencias (claves, diferencias) de cada proceso."""
+        cambios = [(claves, diferencias) for claves, diferencias in cambios if len(claves)]
+        if not cambios:
+            return
+        claves = np.concatenate([c for c, _ in cambios])
+        diferencias = np.concatenate([d for _, d in cambios])
+        unicas, inversa, conteos = np.unique(claves, return_inverse=True, return_counts=True)
+        suma = np.zeros((len(unicas), ACCIONES), dtype=np.float32)
+        np.add.at(suma, inversa, diferencias)
+        if self.combinar == "promedio":
+            suma /= conteos[:, None]
+        tabla = self.agente.q_values
+        indices = tabla.indices(unicas)
+        tabla.valores[indices] += suma
+
+    def entrenar(self, episodios):
+        agente = self.agente
+        jugados = 0
+        inicio = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                while jugados < episodios:
+                    ronda = min(self.episodios_por_ronda * self.workers, episodios - jugados)
+                    # Los episodios que sobran se reparten de a uno, así que se juegan exactamente episodios
+                    por_proceso, sobran = divmod(ronda, self.workers)
+                    reparto = [por_proceso + 1] * sobran + [por_proceso] * (self.workers - sobran)
+                    nombre, capacidad, n = self._publicar()
+                    futuros = [
+                        pool.submit(_entrenar_ronda, nombre, capacidad, n, agente.id, agente.alpha, agente.gamma,
+                                    agente.epsilon, cantidad, self.generador.getrandbits(32))
+                        for cantidad in reparto if cantidad
+                    ]
+                    self.combinar_cambios([futuro.result() for futuro in futuros])
+                    jugados += ronda
+                    agente.epsilon = max(0.2, agente.epsilon * 0.995 ** ronda)
+                    segundos = time.perf_counter() - inicio
+                    print(f"Episodio {jugados}/{episodios} ({jugados / segundos:.1f} episodios/s, "
+                          f"{len(agente.q_values)} estados)")
+        finally:
+            self._liberar()
+        return jugados
+
+
+def evaluar(agente, partidas=50, profundidad=3):
+    """Proporción de victorias, empates y derrotas del agente (sin exploración) contra Agent(depth)."""
+    from agent import Agent
+    from motor import Motor
+
+    epsilon = agente.epsilon
+    agente.epsilon = 0
+    rival = Agent(depth=profundidad, player_id=agente.opponent_id)
+    conteo = {"victorias": 0, "empates": 0, "derrotas": 0}
+    try:
+        for partida in range(partidas):
+            random.seed(partida)
+            motor = Motor()
+            # Ambos agentes son deterministas: las dos primeras jugadas al azar varían las partidas
+            for _ in range(2):
+                motor.jugar(random.randrange(7) + 1)
+            while not motor.terminado():
+                jugador = agente if motor.turno == agente.indice else rival
+                motor.jugar(jugador.elegir_movimiento(motor.tablero))
+            if motor.ganador == agente.indice:
+                conteo["victorias"] += 1
+            elif motor.ganador is None:
+                conteo["empates"] += 1
+            else:
+                conteo["derrotas"] += 1
+    finally:
+        agente.epsilon = epsilon
+    return {nombre: n / partidas for nombre, n in conteo.items()}
+
+
+def main():
+    """Uso: python td_paralelo.py [episodios] [workers] [salida]"""
+    from td_agent import TDAgent
+
+    episodios = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    salida = sys.argv[3] if len(sys.argv) > 3 else None
+
+    agente = TDAgent(player_id=1)
+    inicio = time.perf_counter()
+    EntrenadorParalelo(agente, workers=workers).entrenar(episodios)
+    print(f"{episodios / (time.perf_counter() - inicio):.1f} episodios/s")
+    print("Contra Agent(depth=3):", evaluar(agente))
+    if salida:
+        agente.guardar_modelo(salida)
+
+
+if __name__ == "__main__":
+    main()
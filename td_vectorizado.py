@@ -0,0 +1,232 @@
+import numpy as np
+
+from agent import Agent
+from bitboard import Tablero, FILAS, COLUMNAS, ALTO, ABAJO, TABLERO_COMPLETO
+
+# Constantes como np.uint64 para que los desplazamientos no pasen a float
+_U = np.uint64
+_ABAJO = _U(ABAJO)
+_COMPLETO = _U(TABLERO_COMPLETO)
+_UNO = _U(1)
+
+# Bit de cada casilla en el orden de get_estado_tablero (fila 0 arriba)
+_BITS = np.array([[col * ALTO + FILAS - 1 - fila for col in range(COLUMNAS)]
+                  for fila in range(FILAS)], dtype=np.uint64)
+_POPCOUNT_COLUMNA = np.array([bin(i).count('1') for i in range(1 << FILAS)])
+_COLUMNA_CENTRAL = 3
+_MASCARAS_COLUMNA = np.array([((1 << FILAS) - 1) << (col * ALTO) for col in range(COLUMNAS)], dtype=np.uint64)
+
+
+def alineado(mascaras):
+    """Versión vectorizada de bitboard.alineado para un arreglo de máscaras."""
+    resultado = np.zeros(mascaras.shape, dtype=bool)
+    for desplazamiento in (1, ALTO, ALTO - 1, ALTO + 1):
+        m = mascaras & (mascaras >> _U(desplazamiento))
+        resultado |= (m & (m >> _U(2 * desplazamiento))) != 0
+    return resultado
+
+
+def casillas_ganadoras(propias, ocupadas):
+    """Casillas vacías donde una ficha más completaría cuatro en línea."""
+    r = (propias << _U(1)) & (propias << _U(2)) & (propias << _U(3))
+    for d in (ALTO, ALTO - 1, ALTO + 1):
+        p = (propias << _U(d)) & (propias << _U(2 * d))
+        r |= p & (propias << _U(3 * d))
+        r |= p & (propias >> _U(d))
+        p = (propias >> _U(d)) & (propias >> _U(2 * d))
+        r |= p & (propias << _U(d))
+        r |= p & (propias >> _U(3 * d))
+    return r & (_COMPLETO ^ ocupadas)
+
+
+def claves_canonicas(fichas):
+    """Versión vectorizada de Tablero.clave_canonica: devuelve (claves, espejadas)."""
+    claves = fichas[:, 0] + (fichas[:, 0] | fichas[:, 1]) + _ABAJO
+    grupo = _U((1 << ALTO) - 1)
+    espejos = np.zeros_like(claves)
+    for col in range(COLUMNAS):
+        espejos |= ((claves >> _U(col * ALTO)) & grupo) << _U((COLUMNAS - 1 - col) * ALTO)
+    espejadas = espejos < claves
+    return np.where(espejadas, espejos, claves), espejadas
+
+
+def desde_claves(claves):
+    """Inversa vectorizada de Tablero.clave: devuelve fichas (N, 2) y alturas (N, 7)."""
+    claves = np.asarray(claves).astype(np.uint64)
+    fichas = np.zeros((len(claves), 2), dtype=np.uint64)
+    alturas = np.zeros((len(claves), COLUMNAS), dtype=np.int64)
+    ocupadas = np.zeros(len(claves), dtype=np.uint64)
+    for col in range(COLUMNAS):
+        grupo = (claves >> _U(col * ALTO)) & _U((1 << ALTO) - 1)
+        # El bit más alto del grupo marca la primera casilla libre de la columna
+        for altura in range(1, FILAS + 1):
+            alturas[grupo >= _U(1 << altura), col] = altura
+        columna = (_UNO << alturas[:, col].astype(np.uint64)) - _UNO
+        fichas[:, 0] |= (grupo & columna) << _U(col * ALTO)
+        ocupadas |= columna << _U(col * ALTO)
+    fichas[:, 1] = ocupadas ^ fichas[:, 0]
+    return fichas, alturas
+
+
+def a_tableros(fichas):
+    """Convierte un arreglo (N, 2) de máscaras en tableros (N, 6, 7) con 0, 1 y 2."""
+    uno = (fichas[:, 0, None, None] >> _BITS) & _UNO
+    dos = (fichas[:, 1, None, None] >> _BITS) & _UNO
+    return (uno + 2 * dos).astype(np.int8)
+
+
+def fichas_lote(tableros):
+    """Fichas (N, 2) uint64 y alturas (N, 7) de tableros (N, 6, 7) con 0, 1 y 2 o de máscaras (N, 2)."""
+    tableros = np.asarray(tableros)
+    if tableros.ndim == 2:
+        fichas = tableros.astype(np.uint64)
+    else:
+        fichas = np.empty((len(tableros), 2), dtype=np.uint64)
+        for jugador in (0, 1):
+            bits = np.where(tableros == jugador + 1, _UNO << _BITS, _U(0))
+            fichas[:, jugador] = np.bitwise_or.reduce(bits.reshape(len(tableros), -1), axis=1)
+    ocupadas = fichas[:, 0] | fichas[:, 1]
+    columnas = (ocupadas[:, None] >> (_U(ALTO) * np.arange(COLUMNAS, dtype=np.uint64))) & _U((1 << FILAS) - 1)
+    return fichas, _POPCOUNT_COLUMNA[columnas.astype(np.int64)]
+
+
+class EntrenadorVectorizado:
+    """Entrena un TDAgent jugando muchas partidas a la vez con arreglos de NumPy.
+
+    Cada partida es una fila de fichas (N, 2) uint64 y alturas (N, 7). Las
+    victorias, amenazas y recompensas se calculan con operaciones de bits
+    sobre todas las partidas a la vez, y la actualización de TD es la misma
+    de TDAgent.actualizar_q aplicada en bloque sobre los arreglos de la TablaQ
+    del agente. Si dos partidas actualizan el mismo par estado-acción en el
+    mismo paso, se conserva la última.
+
+    oponente puede ser None (Agent de profundidad 3, como en aprender), un
+    objeto con elegir_movimiento, o "aleatorio" para un oponente vectorizado.
+    """
+
+    def __init__(self, agente, n_partidas=256, oponente=None, semilla=None):
+        self.agente = agente
+        self.n = n_partidas
+        if oponente is None:
+            oponente = Agent(depth=3, player_id=agente.opponent_id, alpha_beta=False)
+        self.oponente = oponente
+        self.rng = np.random.default_rng(semilla)
+        self.yo = agente.indice
+        self.rival = agente.indice_oponente
+
+    def _reiniciar(self, indices):
+        self.fichas[indices] = 0
+        self.alturas[indices] = 0
+
+    def _claves(self, indices):
+        claves, espejadas = claves_canonicas(self.fichas[indices])
+        return claves.astype(np.int64), espejadas
+
+    def _jugar(self, indices, columnas, jugador):
+        bits = columnas.astype(np.uint64) * _U(ALTO) + self.alturas[indices, columnas].astype(np.uint64)
+        self.fichas[indices, jugador] |= _UNO << bits
+        self.alturas[indices, columnas] += 1
+
+    def _recompensas(self, indices):
+        """Equivalente vectorizado de TDAgent.calcular_recompensa tras la jugada del agente."""
+        propias = self.fichas[indices, self.yo]
+        rivales = self.fichas[indices, self.rival]
+        ocupadas = propias | rivales
+        # calcular_recompensa pasa columnas 0-6 a simular_movimiento, que espera 1-7,
+        # así que por cada columna válida c prueba la columna c - 1 (la 6 cuando c es 0)
+        validas = self.alturas[indices] < FILAS
+        probadas = np.roll(validas, -1, axis=1)
+        mascara = (probadas * _MASCARAS_COLUMNA).sum(axis=1, dtype=np.uint64)
+        jugables = (ocupadas + _ABAJO) & _COMPLETO & mascara
+        pierde = ((casillas_ganadoras(rivales, ocupadas) & jugables) != 0) | (alineado(rivales) & validas.any(axis=1))
+        amenaza = (casillas_ganadoras(propias, ocupadas) & jugables) != 0
+        centro = _POPCOUNT_COLUMNA[((propias >> _U(_COLUMNA_CENTRAL * ALTO)) & _U((1 << FILAS) - 1)).astype(np.int64)]
+        return np.where(pierde, -1.0, np.where(amenaza, 0.5, 0.1 * centro / FILAS))
+
+    def _actualizar_lote(self, claves, acciones, recompensas, claves_nuevas, terminales):
+        """Regla de actualizar_q aplicada a un lote de transiciones sobre la TablaQ."""
+        q = self.agente.q_values
+        q_max = np.zeros(len(claves))
+        if not terminales.all():
+            filas_nuevas = q.indices(claves_nuevas[~terminales])
+            q_max[~terminales] = q.valores[filas_nuevas].max(axis=1)
+        filas = q.indices(claves)
+        q_actual = q.valores[filas, acciones].astype(float)
+        q.valores[filas, acciones] = q_actual + self.agente.alpha * (
+            recompensas + self.agente.gamma * q_max - q_actual
+        )
+
+    def _elegir_oponente(self, indices, validas):
+        if self.oponente == "aleatorio":
+            puntajes = self.rng.random((len(indices), COLUMNAS))
+            puntajes[~validas] = -1.0
+            return puntajes.argmax(axis=1)
+        columnas = []
+        for i in indices:
+            tablero = Tablero.desde_mascaras([int(self.fichas[i, 0]), int(self.fichas[i, 1])], self.alturas[i].tolist())
+            columnas.append(self.oponente.elegir_movimiento(tablero) - 1)
+        return np.array(columnas, dtype=np.int64)
+
+    def entrenar(self, episodios):
+        """Juega episodios partidas en total, n_partidas a la vez."""
+        agente = self.agente
+        self.fichas = np.zeros((self.n, 2), dtype=np.uint64)
+        self.alturas = np.zeros((self.n, COLUMNAS), dtype=np.int64)
+        activas = np.zeros(self.n, dtype=bool)
+        activas[:min(self.n, episodios)] = True
+        lanzados = int(activas.sum())
+        terminados = 0
+
+        while activas.any():
+            indices = np.nonzero(activas)[0]
+
+            # Turno del agente
+            validas = self.alturas[indices] < FILAS
+            claves, espejadas = self._claves(indices)
+            explorar = self.rng.random(len(indices)) < agente.epsilon
+            puntajes = self.rng.random((len(indices), COLUMNAS))
+            if not explorar.all():
+                filas = agente.q_values.indices(claves)
+                valores_q = agente.q_values.valores[filas].astype(float)
+                # Las claves canónicas guardan las posiciones reflejadas con las acciones invertidas
+                valores_q[espejadas] = valores_q[espejadas, ::-1]
+                puntajes[~explorar] = valores_q[~explorar]
+            puntajes[~validas] = -np.inf
+            acciones = puntajes.argmax(axis=1)
+
+            self._jugar(indices, acciones, self.yo)
+            gana = alineado(self.fichas[indices, self.yo])
+            lleno = (self.fichas[indices, 0] | self.fichas[indices, 1]) == _COMPLETO
+            recompensas = np.where(gana, 1.0, np.where(lleno, 0.0, self._recompensas(indices)))
+            acciones_q = np.where(espejadas, COLUMNAS - 1 - acciones, acciones)
+            self._actualizar_lote(claves, acciones_q, recompensas, self._claves(indices)[0], lleno)
+            fin = gana | lleno
+
+            # Turno del oponente en las partidas que siguen
+            siguen = indices[~fin]
+            if len(siguen):
+                columnas = self._elegir_oponente(siguen, self.alturas[siguen] < FILAS)
+                self._jugar(siguen, columnas, self.rival)
+                gana_rival = alineado(self.fichas[siguen, self.rival])
+                lleno_rival = (self.fichas[siguen, 0] | self.fichas[siguen, 1]) == _COMPLETO
+                if gana_rival.any():
+                    perdidas = siguen[gana_rival]
+                    claves_perdidas, espejadas = self._claves(perdidas)
+                    acciones_q = np.where(espejadas, COLUMNAS - 1 - columnas[gana_rival], columnas[gana_rival])
+                    self._actualizar_lote(claves_perdidas, acciones_q, np.full(len(perdidas), -1.0),
+                                          claves_perdidas, lleno_rival[gana_rival])
+                fin[~fin] = gana_rival | lleno_rival
+
+            # Las partidas terminadas dejan su lugar a episodios nuevos
+            for i in indices[fin]:
+                terminados += 1
+                agente.epsilon = max(0.2, agente.epsilon * 0.995)
+                if terminados % 1000 == 0:
+                    print(f"Episodio {terminados}/{episodios}")
+                if lanzados < episodios:
+                    self._reiniciar(i)
+                    lanzados += 1
+                else:
+                    activas[i] = False
+
+        return terminados
@@ -0,0 +1,40 @@
+import random
+
+from agent import Agent
+from evaluacion import TableroEvaluado
+
+PARTIDAS = 200
+
+
+def _comprobar(agente, tablero):
+    esperado = agente.evaluar_tablero(tablero.a_lista())
+    assert tablero.puntuacion == esperado, (tablero.historial, tablero.puntuacion, esperado)
+
+
+def test_puntuacion_igual_a_evaluar_tablero():
+    """La puntuación incremental coincide con evaluar_tablero al jugar y al deshacer."""
+    generador = random.Random(2024)
+    agente = Agent(1, '1')
+    for _ in range(PARTIDAS):
+        tablero = TableroEvaluado()
+        _comprobar(agente, tablero)
+        # Se juega hasta llenar el tablero, también después de cuatro en línea
+        while tablero.movimientos_validos():
+            tablero.jugar(generador.choice(tablero.movimientos_validos()), tablero.num_fichas() % 2)
+            _comprobar(agente, tablero)
+            if generador.random() < 0.3:
+                tablero.deshacer()
+                _comprobar(agente, tablero)
+        while tablero.historial:
+            tablero.deshacer()
+            _comprobar(agente, tablero)
+
+
+def test_desde_lista_igual_a_evaluar_tablero():
+    generador = random.Random(7)
+    agente = Agent(1, '1')
+    for _ in range(PARTIDAS):
+        tablero = TableroEvaluado()
+        for _ in range(generador.randint(0, 42)):
+            tablero.jugar(generador.choice(tablero.movimientos_validos()), tablero.num_fichas() % 2)
+        _comprobar(agente, TableroEvaluado.desde_lista(tablero.a_lista()))
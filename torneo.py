@@ -0,0 +1,178 @@
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from instrumentacion import Instrumentacion
+from motor import Motor
+
+# Agentes ya construidos en cada proceso, indexados por (especificación, player_id)
+_agentes = {}
+# Tablas Q ya cargadas en cada proceso, indexadas por archivo
+_modelos = {}
+
+
+def crear_agente(especificacion, player_id):
+    """Construye un agente a partir de un diccionario serializable.
+
+    Ejemplos:
+        {"tipo": "minimax", "depth": 3, "alpha_beta": True}
+        {"tipo": "td", "modelo": "td_model.pkl", "epsilon": 0.2}
+        {"tipo": "mcts", "iteraciones": 5000}
+    Cualquier otra clave se pasa tal cual al constructor. Los agentes TD
+    juegan sin exploración (epsilon=0) salvo que se indique epsilon.
+    """
+    parametros = dict(especificacion)
+    tipo = parametros.pop("tipo")
+    if tipo == "minimax":
+        from agent import Agent
+        return Agent(player_id=player_id, **parametros)
+    if tipo == "td":
+        from td_agent import TDAgent
+        modelo = parametros.pop("modelo", None)
+        parametros.setdefault("epsilon", 0)
+        agente = TDAgent(player_id=player_id, **parametros)
+        if modelo:
+            if modelo not in _modelos:
+                agente.cargar_modelo(modelo)
+                _modelos[modelo] = agente.q_values
+            agente.q_values = _modelos[modelo]
+        return agente
+    if tipo == "mcts":
+        from mcts import MCTSAgent
+        return MCTSAgent(player_id=player_id, **parametros)
+    raise ValueError(f"Tipo de agente desconocido: {tipo}")
+
+
+def _agente(especificacion, player_id):
+    clave = (json.dumps(especificacion, sort_keys=True), player_id)
+    if clave not in _agentes:
+        _agentes[clave] = crear_agente(especificacion, player_id)
+    agente = _agentes[clave]
+    if hasattr(agente, "nueva_partida"):
+        agente.nueva_partida()
+    return agente
+
+
+def jugar_partida(id_partida, nombre1, especificacion1, nombre2, especificacion2, instrumentar=False):
+    """Juega una partida sin interfaz gráfica y devuelve su registro.
+
+    Con instrumentar=True el registro incluye en "perfil" los datos de cada
+    jugada de instrumentacion.Instrumentacion. Si un agente lanza una
+    excepción o elige una jugada inválida, el ganador es "error".
+    """
+    random.seed(id_partida)
+    agentes = (_agente(especificacion1, 1), _agente(especificacion2, 2))
+    nombres = (nombre1, nombre2)
+    if instrumentar:
+        perfil = Instrumentacion()
+        for agente, nombre in zip(agentes, nombres):
+            perfil.instrumentar(agente, nombre)
+    motor = Motor()
+    latencias = []
+    ganador = "empate"
+
+    try:
+        while not motor.terminado():
+            turno = motor.turno
+            inicio = time.perf_counter()
+            columna = agentes[turno].elegir_movimiento(motor.tablero)
+            latencias.append(round((time.perf_counter() - inicio) * 1000, 3))
+            if not motor.jugar(columna):
+                ganador = "error"
+                break
+            if motor.ganador is not None:
+                ganador = nombres[motor.ganador]
+    except Exception:
+        # Un agente que falla cuenta como partida con error, sin detener el torneo
+        ganador = "error"
+    finally:
+        # Los agentes se reutilizan entre partidas, así que se restauran aunque falle una jugada
+        if instrumentar:
+            for agente in agentes:
+                perfil.desinstrumentar(agente)
+
+    registro = {
+        "partida": id_partida,
+        "jugador1": nombre1,
+        "jugador2": nombre2,
+        "ganador": ganador,
+        "movimientos": len(latencias),
+        "latencias_ms": latencias,
+    }
+    if instrumentar:
+        registro["perfil"] = perfil.registros
+    return registro
+
+
+def calendario(agentes, partidas_por_pareja):
+    """Todas contra todas; cada pareja alterna quién empieza."""
+    nombres = list(agentes)
+    partidas = []
+    for i, a in enumerate(nombres):
+        for b in nombres[i + 1:]:
+            for k in range(partidas_por_pareja):
+                primero, segundo = (a, b) if k % 2 == 0 else (b, a)
+                partidas.append((f"{a} vs {b} #{k}", primero, segundo))
+    return partidas
+
+
+def leer_resultados(archivo):
+    """Lee los registros ya guardados, ignorando una última línea incompleta."""
+    registros = []
+    if not os.path.exists(archivo):
+        return registros
+    with open(archivo) as f:
+        for linea in f:
+            try:
+                registros.append(json.loads(linea))
+            except json.JSONDecodeError:
+                break
+    return registros
+
+
+def jugar_torneo(agentes, partidas_por_pareja, archivo, workers=None, reanudar=True, instrumentar=False):
+    """Juega un torneo todos contra todos repartiendo las partidas entre procesos.
+
+    agentes es un diccionario nombre -> especificación (ver crear_agente).
+    Cada partida terminada se añade como una línea JSON al archivo, y si
+    reanudar es True se saltan las partidas que ya están en él. Con
+    instrumentar=True cada registro lleva el perfil de sus jugadas.
+    """
+    registros = leer_resultados(archivo) if reanudar else []
+    hechas = {r["partida"] for r in registros}
+    pendientes = [p for p in calendario(agentes, partidas_por_pareja) if p[0] not in hechas]
+    print(f"Torneo: {len(pendientes)} partidas pendientes, {len(hechas)} ya jugadas")
+
+    with open(archivo, "w") as salida, ProcessPoolExecutor(max_workers=workers) as pool:
+        # Se reescriben los registros válidos para descartar una línea cortada
+        for registro in registros:
+            salida.write(json.dumps(registro) + "\n")
+        salida.flush()
+
+        futuros = [
+            pool.submit(jugar_partida, id_partida, a, agentes[a], b, agentes[b], instrumentar)
+            for id_partida, a, b in pendientes
+        ]
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            salida.write(json.dumps(futuro.result()) + "\n")
+            salida.flush()
+            if i % 10 == 0:
+                print(f"Partida {i}/{len(pendientes)}")
+
+    return resumir(leer_resultados(archivo))
+
+
+def resumir(registros):
+    """Cuenta resultados por enfrentamiento: {(a, b): {a: n, b: n, "empate": n, "error": n}}.
+
+    Las partidas que terminan con una jugada inválida cuentan como "error",
+    no como empate.
+    """
+    resumen = {}
+    for registro in registros:
+        pareja = tuple(sorted((registro["jugador1"], registro["jugador2"])))
+        conteo = resumen.setdefault(pareja, {pareja[0]: 0, pareja[1]: 0, "empate": 0, "error": 0})
+        conteo[registro["ganador"]] += 1
+    return resumen
@@ -0,0 +1,63 @@
+EXACTO = 0
+INFERIOR = 1  # El valor real es mayor o igual al guardado
+SUPERIOR = 2  # El valor real es menor o igual al guardado
+
+
+class TablaTransposicion:
+    """Tabla de transposición de tamaño fijo indexada por hash de Zobrist.
+
+    Cada casilla guarda (clave, profundidad, valor, tipo, mejor, generacion).
+    Al guardar se reemplaza la entrada existente si es de la misma posición,
+    de una búsqueda anterior o de menor profundidad.
+    """
+
+    def __init__(self, tamano=1 << 18):
+        self.tamano = tamano
+        self.casillas = [None] * tamano
+        self.generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.colisiones = 0
+
+    def nueva_busqueda(self):
+        """Marca el inicio de una nueva llamada a elegir_movimiento."""
+        self.generacion += 1
+
+    def buscar(self, clave):
+        """Devuelve la entrada guardada para la clave o None."""
+        entrada = self.casillas[clave % self.tamano]
+        if entrada is None:
+            self.fallos += 1
+            return None
+        if entrada[0] != clave:
+            self.colisiones += 1
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return entrada
+
+    def guardar(self, clave, profundidad, valor, tipo, mejor):
+        indice = clave % self.tamano
+        entrada = self.casillas[indice]
+        if (entrada is None or entrada[0] == clave or entrada[5] != self.generacion
+                or entrada[1] <= profundidad):
+            self.casillas[indice] = (clave, profundidad, valor, tipo, mejor, self.generacion)
+
+    def limpiar(self):
+        self.casillas = [None] * self.tamano
+        self.generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.colisiones = 0
+
+    def estadisticas(self):
+        """Devuelve los contadores de uso de la tabla."""
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "colisiones": self.colisiones,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "ocupadas": sum(1 for entrada in self.casillas if entrada is not None),
+            "tamano": self.tamano,
+        }